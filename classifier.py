@@ -1,11 +1,21 @@
-import json
-from datetime import datetime
-from openai import OpenAI
-from config import OPENAI_API_KEY
-from prompts import CLASSIFIER_PROMPT, get_extract_fields_prompt
-
-# Initialize OpenAI client
-client = OpenAI(api_key=OPENAI_API_KEY)
+import asyncio
+import copy
+import re
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+import orjson
+from config import LLM_CACHE
+from llm import (
+    LLM_ERRORS, MODEL_TIERS, CACHE_TTL_SECONDS, achat, achat_stream, aembed, cosine,
+    semantic_cache_enabled, lexical_guard, asemantic_lookup, semantic_store
+)
+from prompts import (
+    CLASSIFIER_PROMPT, CLASSIFIER_RESPONSE_FORMAT,
+    PEOPLE_QUERY_PROMPT, ACTIONABLE_QUERY_PROMPT,
+    get_extract_fields_prompt, get_extract_fields_response_format,
+    get_people_query_message, get_actionable_query_message
+)
 
 # =============================================================================
 # CLASSIFICATION RULES
@@ -13,23 +23,67 @@ client = OpenAI(api_key=OPENAI_API_KEY)
 
 CONFIDENCE_THRESHOLD = 0.6  # Below this, ask user to confirm
 
+# Output caps - replies are small fixed-shape JSON, so stop runaway generation early
+CLASSIFY_MAX_TOKENS = 300   # Bucket, confidence and a handful of short fields
+EXTRACT_MAX_TOKENS = 250    # Fields only
+
+
+def _output_budget(base: int, message: str) -> int:
+    """Token cap for a reply that may echo the message (e.g. LinkedIn notes), ~4 chars per token."""
+    return base + len(message) // 4
+
 # Keywords that FORCE a category (checked before LLM)
 FORCE_RULES = {
     "linkedin": ["draft"],  # If message contains "draft", always linkedin
 }
 
+# All force keywords compiled into one pattern so a message is scanned once, with a
+# named group per bucket so a match says which bucket it forces.
+# IGNORECASE folds case while scanning, so the message is never copied with .lower().
+# Keywords must start a word ("overdraft" isn't a draft) but may be inflected ("drafts", "drafting").
+_FORCE_PATTERN = re.compile(
+    r"\b(?:" + "|".join(
+        f"(?P<{bucket}>{'|'.join(map(re.escape, keywords))})" for bucket, keywords in FORCE_RULES.items()
+    ) + ")",
+    re.IGNORECASE
+)
+
 
 def check_force_rules(message: str) -> str | None:
     """Check if any force rules apply. Returns bucket name or None."""
-    message_lower = message.lower()
-    for bucket, keywords in FORCE_RULES.items():
-        for keyword in keywords:
-            if keyword in message_lower:
-                return bucket
-    return None
+    match = _FORCE_PATTERN.search(message)
+    return match.lastgroup if match else None
+
+
+ESCALATE_MIN_CHARS = 30  # Shorter messages don't carry enough signal for a bigger model to help
+
+
+def pick_model(message: str, confidence: float) -> str:
+    """Model for classifying a message given the fast tier's confidence."""
+    if MODEL_TIERS["quality"] and confidence <= CONFIDENCE_THRESHOLD and len(message) >= ESCALATE_MIN_CHARS:
+        return MODEL_TIERS["quality"]
+    return MODEL_TIERS["fast"]
+
+
+async def _llm_classify(message: str, model: str) -> dict:
+    """One call returns bucket + fields, so no extract_fields follow-up is needed."""
+    return orjson.loads(await achat(
+        message,
+        model=model,
+        response_format=CLASSIFIER_RESPONSE_FORMAT,
+        system=CLASSIFIER_PROMPT,
+        max_tokens=_output_budget(CLASSIFY_MAX_TOKENS, message)
+    ))
+
 
+CLASSIFY_MEMO_SIZE = 512  # Recent classifications kept for messages sent again
 
-def classify(message: str) -> dict:
+# Whitespace-normalized message -> (classification, expiry time); checked before any API call.
+# Expires with the LLM response cache, so a prompt or model change reaches repeats within a day
+_classify_memo = OrderedDict()
+
+
+async def classify(message: str) -> dict:
     """Classify a message into a bucket with confidence score."""
     
     # Check force rules first
@@ -38,43 +92,79 @@ def classify(message: str) -> dict:
         return {
             "bucket": forced_bucket,
             "confidence": 1.0,
-            "fields": extract_fields(message, forced_bucket)
+            "fields": await extract_fields(message, forced_bucket)
         }
     
+    # Same message again (e.g. a forwarded reminder) - reuse the earlier result.
+    # Copied because callers (e.g. the fix command) modify the classification.
+    memo_key = " ".join(message.split())
+    memo = _classify_memo.get(memo_key) if LLM_CACHE != "off" else None
+    if memo and memo[1] <= time.monotonic():
+        del _classify_memo[memo_key]
+    elif memo:
+        _classify_memo.move_to_end(memo_key)
+        return copy.deepcopy(memo[0])
+    
+    # Check semantic cache for paraphrases of earlier messages
+    vector = None
+    guard = lexical_guard(message)
+    if semantic_cache_enabled():
+        try:
+            vector, cached = await asemantic_lookup("classify", message, guard)
+            if cached:
+                return cached
+        except LLM_ERRORS as e:
+            print(f"Semantic cache error: {e}")
+    
     # Call LLM
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "user", "content": CLASSIFIER_PROMPT + message}
-            ],
-            temperature=0.3
-        )
-        result = response.choices[0].message.content.strip()
-        return json.loads(result)
-    except Exception as e:
+        result = await _llm_classify(message, MODEL_TIERS["fast"])
+        
+        # Unsure about a substantial message - let the quality tier take a second look
+        if pick_model(message, result["confidence"]) != MODEL_TIERS["fast"]:
+            try:
+                result = await _llm_classify(message, MODEL_TIERS["quality"])
+            except LLM_ERRORS as e:
+                print(f"Quality classifier error: {e}")
+        
+        if vector:
+            semantic_store("classify", vector, result, guard)
+        if LLM_CACHE != "off":
+            _classify_memo[memo_key] = (copy.deepcopy(result), time.monotonic() + CACHE_TTL_SECONDS)
+            _classify_memo.move_to_end(memo_key)
+            if len(_classify_memo) > CLASSIFY_MEMO_SIZE:
+                _classify_memo.popitem(last=False)
+        return result
+    except LLM_ERRORS as e:
+        # Couldn't classify - file it as a task to review; the low confidence asks the user to confirm
         print(f"Classifier error: {e}")
         return {
-            "bucket": "admin",
+            "bucket": "things",
             "confidence": 0.3,
             "fields": {"task": message[:50], "status": "Open", "due": "", "next_action": "Review this item"}
         }
 
 
-def extract_fields(message: str, bucket: str) -> dict:
+def linkedin_fields(message: str) -> dict:
+    """LinkedIn fields filled from the message itself - the note is the draft."""
+    return {"idea": message[:50], "notes": message, "status": "Draft"}
+
+
+async def extract_fields(message: str, bucket: str) -> dict:
     """Extract fields for a forced bucket classification."""
+    # A LinkedIn draft is kept verbatim, so there is nothing for the LLM to restructure
+    if bucket == "linkedin":
+        return linkedin_fields(message)
+    
     try:
-        prompt = get_extract_fields_prompt(bucket, message)
-        
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3
-        )
-        return json.loads(response.choices[0].message.content.strip())
-    except:
-        if bucket == "linkedin":
-            return {"idea": message[:50], "notes": message, "status": "Draft"}
+        return orjson.loads(await achat(
+            message,
+            response_format=get_extract_fields_response_format(bucket),
+            system=get_extract_fields_prompt(bucket),
+            max_tokens=_output_budget(EXTRACT_MAX_TOKENS, message)
+        ))
+    except LLM_ERRORS as e:
+        print(f"Extract fields error: {e}")
         return {}
 
 
@@ -83,21 +173,25 @@ def needs_confirmation(confidence: float) -> bool:
     return confidence <= CONFIDENCE_THRESHOLD
 
 
+# Question indicators, matched case-insensitively as whole words at the start of a message
+QUESTION_STARTERS = [
+    "who", "what", "tell me", "tell about", "what about",
+    "where", "when", "how", "why", "does", "is", "are",
+    "do", "anyone", "anybody", "which", "show me"
+]
+_QUESTION_START_PATTERN = re.compile(
+    r"(?:" + "|".join(re.escape(q) for q in QUESTION_STARTERS) + r")\b",
+    re.IGNORECASE
+)
+
+
 def is_person_question(message: str) -> dict:
     """
     Detect if message is a question about people.
     Simple check - if it looks like a question, return True.
     """
-    message_lower = message.lower().strip()
-    
-    # Question indicators
-    question_starters = [
-        "who ", "what ", "tell me", "tell about", "what about",
-        "where ", "when ", "how ", "why ", "does ", "is ", "are ",
-        "do ", "anyone", "anybody", "which ", "show me"
-    ]
     ends_with_question = message.endswith("?")
-    starts_with_question = any(message_lower.startswith(q) for q in question_starters)
+    starts_with_question = _QUESTION_START_PATTERN.match(message.strip()) is not None
     
     if ends_with_question or starts_with_question:
         return {"is_question": True, "query": message}
@@ -105,194 +199,257 @@ def is_person_question(message: str) -> dict:
     return {"is_question": False}
 
 
-def answer_people_query(question: str, all_people: list) -> str:
+PEOPLE_QUERY_TOP_K = 20  # Max people sent to the LLM per question
+PEOPLE_ANSWER_MAX_TOKENS = 300  # Answers are a few short lines; stops run-on replies
+
+_WORD_RE = re.compile(r"\w+")
+
+# Words that say nothing about which person a question is about, including every question starter
+_STOP_WORDS = frozenset({
+    "a", "an", "the", "and", "or", "of", "to", "in", "on", "at", "for", "with", "from", "by",
+    "who", "whom", "whose", "what", "which", "where", "when", "why", "how",
+    "is", "are", "was", "were", "be", "been", "do", "does", "did", "has", "have", "had",
+    "i", "me", "my", "we", "our", "you", "he", "she", "they", "them", "his", "her", "their",
+    "it", "its", "that", "this", "these", "those", "any", "anyone", "anybody", "someone",
+    "tell", "about", "know", "show", "people", "person", "there", "can", "should", "would"
+}) | frozenset(word for starter in QUESTION_STARTERS for word in starter.split())
+
+
+def extract_search_keywords(question: str) -> frozenset:
+    """Lowercase content words of a question."""
+    return frozenset(w for w in _WORD_RE.findall(question.lower()) if len(w) > 1 and w not in _STOP_WORDS)
+
+
+def get_person_search_tokens(person: dict) -> frozenset:
+    """
+    Lowercase word set of a person's name, context, notes and follow-ups.
+    Memoized on the person dict, which memory.get_all_people() reuses until the
+    People values are re-read.
+    """
+    tokens = person.get("_search_tokens")
+    if tokens is None:
+        blob = f"{person['name']} {person.get('context', '')} {person.get('notes', '')} {person.get('follow_ups', '')}"
+        tokens = person["_search_tokens"] = frozenset(_WORD_RE.findall(blob.lower()))
+    return tokens
+
+
+# Inverted index of the People list last searched: word -> indexes of people containing it
+_keyword_index = {"people": None, "size": 0, "index": {}}
+
+
+def get_keyword_index(all_people: list) -> dict:
+    """
+    Word -> set of people indexes for this People list.
+    Built once per list; memory.get_all_people() hands out the same list until the
+    People values are re-read, so repeat searches over that snapshot skip the scan.
+    """
+    if _keyword_index["people"] is not all_people or _keyword_index["size"] != len(all_people):
+        index = {}
+        for i, person in enumerate(all_people):
+            for token in get_person_search_tokens(person):
+                index.setdefault(token, set()).add(i)
+        _keyword_index.update(people=all_people, size=len(all_people), index=index)
+    return _keyword_index["index"]
+
+
+def search_people_by_keywords(keywords: frozenset, all_people: list) -> set:
+    """Indexes of people whose data contains any of the keywords."""
+    if not keywords:
+        return set()
+    index = get_keyword_index(all_people)
+    return set().union(*(index.get(keyword, ()) for keyword in keywords))
+
+# Person search text -> embedding, pruned to the current People list on every query
+_person_embeddings = {}
+
+
+def start_question_embedding(question: str) -> asyncio.Task:
+    """
+    Start embedding a question in the background, e.g. while the People sheet loads.
+    Pass the task to answer_people_query(); it is cancelled if it turns out not to be needed.
+    """
+    return asyncio.create_task(aembed([question]))
+
+
+async def select_relevant_people(question: str, all_people: list, k: int = PEOPLE_QUERY_TOP_K,
+                                 question_embedding: asyncio.Task | None = None) -> list:
     """
-    One LLM call - send all people data and the question.
+    Pick the k people most relevant to the question, in sheet order.
+    People whose data contains a word from the question come first, then the
+    most similar by embedding. Returns everyone when there are k or fewer people,
+    or if embedding fails.
+    """
+    if len(all_people) <= k:
+        if question_embedding:
+            question_embedding.cancel()
+        return all_people
+    
+    texts = [f"{p['name']} {p.get('context', '')} {p.get('notes', '')}"[:2000] for p in all_people]
+    
+    try:
+        known = {text: _person_embeddings[text] for text in texts if text in _person_embeddings}
+        missing = [text for text in dict.fromkeys(texts) if text not in known]
+        
+        if question_embedding:
+            # Question is already being embedded; only new or changed people are left
+            question_vector = (await question_embedding)[0]
+            vectors = [question_vector] + (await aembed(missing) if missing else [])
+        else:
+            # Embed the question together with any new or changed people
+            vectors = await aembed([question] + missing)
+            question_vector = vectors[0]
+        known.update(zip(missing, vectors[1:]))
+        
+        _person_embeddings.clear()
+        _person_embeddings.update(known)
+    except LLM_ERRORS as e:
+        print(f"People retrieval error: {e}")
+        return all_people
+    
+    keyword_hits = search_people_by_keywords(extract_search_keywords(question), all_people)
+    ranked = sorted(
+        range(len(all_people)),
+        key=lambda i: (i in keyword_hits, cosine(question_vector, known[texts[i]])),
+        reverse=True
+    )
+    return [all_people[i] for i in sorted(ranked[:k])]
+
+
+# Notes are the longest field; cap them in prompts (~4 chars per token)
+PROMPT_NOTES_CHARS = 300       # People query
+ACTIONABLE_NOTES_CHARS = 200   # Actionable query
+
+
+def truncate_words(text: str, limit: int) -> str:
+    """
+    Shorten text to about limit characters, cutting at a word boundary so no
+    word (or emoji sequence) is sent half-finished.
+    """
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    if not text[limit].isspace() and " " in cut:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut.rstrip(" •,;") + "…"
+
+
+def get_person_prompt_block(person: dict) -> str:
+    """
+    Serialize one person for the people prompt.
+    Memoized on the person dict; memory.get_all_people() keeps handing out the same
+    dicts until the People values are re-read, so the block is built once per snapshot.
+    """
+    block = person.get("_prompt_block")
+    if block is None:
+        parts = [f"\n---\nName: {person['name']}"]
+        if person.get('context'):
+            parts.append(f"\nContext: {person['context']}")
+        if person.get('notes'):
+            parts.append(f"\nNotes: {truncate_words(person['notes'], PROMPT_NOTES_CHARS)}")
+        if person.get('follow_ups'):
+            parts.append(f"\nFollow-ups: {person['follow_ups']}")
+        if person.get('last_touched'):
+            parts.append(f"\nLast updated: {format_short_date(person['last_touched'])}")
+        block = person["_prompt_block"] = "".join(parts)
+    return block
+
+
+async def answer_people_query(question: str, all_people: list, question_embedding: asyncio.Task | None = None) -> str:
+    """
+    One LLM call - send the most relevant people data and the question.
     LLM figures out everything.
     """
+    pieces = [piece async for piece in answer_people_query_stream(question, all_people, question_embedding)]
+    return "".join(pieces).strip()
+
+
+async def answer_people_query_stream(question: str, all_people: list, question_embedding: asyncio.Task | None = None):
+    """Streaming version of answer_people_query(). Yields the answer as it is generated."""
     if not all_people:
-        return "I don't have any people saved yet."
+        if question_embedding:
+            question_embedding.cancel()
+        yield "I don't have any people saved yet."
+        return
     
-    # Build all people data
-    people_data = ""
-    for p in all_people:
-        people_data += f"\n---\nName: {p['name']}"
-        if p.get('context'):
-            people_data += f"\nContext: {p['context']}"
-        if p.get('notes'):
-            people_data += f"\nNotes: {p['notes'][:300]}"
-        if p.get('follow_ups'):
-            people_data += f"\nFollow-ups: {p['follow_ups']}"
-        if p.get('last_touched'):
-            people_data += f"\nLast updated: {p['last_touched']}"
+    # Build people data for the question
+    relevant_people = await select_relevant_people(question, all_people, question_embedding=question_embedding)
+    people_data = "".join(get_person_prompt_block(p) for p in relevant_people)
     
-    prompt = f"""You are a personal assistant. Here is everyone I know:
-
-{people_data}
-
-Question: "{question}"
-
-Rules:
-- Answer naturally and concisely, like a friend would
-- Use ALL the data (context, notes, follow-ups) to answer
-- ONLY include people whose data actually answers the question
-- If the question is about a trait (works at X, lives in Y), only return people whose data explicitly mentions that trait
-- If multiple people with the same name exist, do NOT group them together unless BOTH match the query
-- If asking about a specific person by name and multiple exist, show all of them
-- If the data doesn't answer the question, say so honestly
-- Keep it short and conversational
-- Don't make up information that isn't in the data
-
-FORMATTING RULES (very important):
-- NO markdown. No asterisks, no bold, no italic, no headers
-- NO dashes or hyphens as separators
-- Use commas to separate details
-- NO labels like "Name:" or "Context:" or "Notes:"
-- NO raw dates like [2026-01-31]
-- NO filler like "Let me know if you need more" or "Here's what I found"
-- If someone has no follow-ups or notes, just skip it, don't mention it's empty
-- For multiple people with same name, use numbered list like:
-  Two Sarahs:
-  1. Sarah, works at Apple as a designer. Joined a new gym in NH.
-  2. Sarah, met at conference. Amazing speaker. Meeting again in NY next month.
-
-Example good answer: Jack, met at residency. Lives in Boston, works at McKinsey.
-Example bad answer: **Jack** - Met at residency. Lives in Boston. **Works at:** McKinsey. **Last updated:** Jan 31"""
+    prompt = get_people_query_message(people_data, question)
 
+    started = False
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3
-        )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
+        async for piece in achat_stream(prompt, system=PEOPLE_QUERY_PROMPT, max_tokens=PEOPLE_ANSWER_MAX_TOKENS):
+            started = True
+            yield piece
+    except LLM_ERRORS as e:
         print(f"People query error: {e}")
-        return "Sorry, I couldn't process that question."
+        # Part of the answer is already on screen - say it stopped rather than tacking an apology onto it
+        yield "\n\n(answer cut off)" if started else "Sorry, I couldn't process that question."
 
 
-def answer_actionable_query(question: str, data: dict) -> str:
+async def answer_actionable_query(question: str, data: dict) -> str:
     """
     One LLM call — send people + things data, LLM returns today's actions.
     """
     if not data:
         return "No data available."
     
-    people_data = ""
+    people_parts = []
     for p in data.get("people", []):
-        people_data += f"\nName: {p['name']}"
+        people_parts.append(f"\nName: {p['name']}")
         if p.get('context'):
-            people_data += f", {p['context']}"
+            people_parts.append(f", {p['context']}")
         if p.get('notes'):
-            people_data += f", Notes: {p['notes'][:200]}"
+            people_parts.append(f", Notes: {truncate_words(p['notes'], ACTIONABLE_NOTES_CHARS)}")
         if p.get('follow_ups'):
-            people_data += f", Action: {p['follow_ups']}"
+            people_parts.append(f", Action: {p['follow_ups']}")
+    people_data = "".join(people_parts)
     
-    things_data = ""
+    things_parts = []
     for t in data.get("things", []):
-        things_data += f"\nTask: {t['task']}"
+        things_parts.append(f"\nTask: {t['task']}")
         if t.get('due'):
-            things_data += f", due: {t['due']}"
+            things_parts.append(f", due: {t['due']}")
         if t.get('next_action'):
-            things_data += f", next: {t['next_action']}"
+            things_parts.append(f", next: {t['next_action']}")
+    things_data = "".join(things_parts)
     
     today = datetime.now().strftime("%A, %B %d, %Y")
     
-    prompt = f"""You are a personal assistant. Today is {today}.
-
-PEOPLE AND THEIR PENDING ACTIONS:
-{people_data if people_data else "None"}
-
-OPEN TASKS:
-{things_data if things_data else "None"}
-
-Question: "{question}"
+    prompt = get_actionable_query_message(today, people_data, things_data, question)
 
-YOUR JOB: Find actionable items from BOTH sections above.
-
-People actions include: calls to make, people to text/follow up with, gifts to buy, meetings to schedule, things to check. Look at the "Action" field AND the context/notes for anything that sounds like a to-do.
-
-Things actions include: bills to pay, errands, tasks with due dates.
-
-TIME FILTERING:
-- If question says "today": return items due today, plus undated actions that could be done today. Items with no specific date ARE eligible — they're ongoing to-dos.
-- If question says "this week": return items due this week plus undated actions.
-- If a date has clearly passed (e.g. "Friday" and today is Saturday), still include it as overdue.
-
-FORMAT (follow exactly, note the blank line between sections):
+    try:
+        return await achat(prompt, system=ACTIONABLE_QUERY_PROMPT)
+    except LLM_ERRORS as e:
+        print(f"Actionable query error: {e}")
+        return "Sorry, I couldn't process that."
 
-People:
-1. action here
-2. action here
 
-Things:
-1. action here
+_MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
 
-RULES:
-- NO markdown, no asterisks, no bold, no dashes
-- Always put a blank line between People and Things sections
-- Max 3 people actions, max 2 things actions
-- If no people actions, skip the People section entirely
-- If no things actions, skip the Things section entirely
-- One short line per item, start with name
-- If absolutely nothing is actionable, say: All clear, nothing pending."""
 
+def format_short_date(timestamp: str) -> str:
+    """Turn a sheet timestamp like '2026-01-31 10:15:00' into 'Jan 31'."""
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3
-        )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        print(f"Actionable query error: {e}")
-        return "Sorry, I couldn't process that."
+        d = date.fromisoformat(timestamp[:10])
+    except ValueError:
+        return timestamp
+    return f"{_MONTHS[d.month - 1]} {d.day}"
 
 
-def semantic_person_match(existing_name: str, existing_context: str, new_name: str, new_context: str) -> str:
-    """
-    Use GPT to determine if two person entries are the same person.
-    
-    Returns:
-    - "SAME" → definitely same person, auto-merge
-    - "LIKELY_SAME" → probably same, ask user
-    - "LIKELY_DIFFERENT" → probably different, ask user  
-    - "DIFFERENT" → definitely different, save as new
-    """
-    prompt = f"""You are comparing two entries to determine if they refer to the same person.
+FORMAT_MAX_PARTS = 4  # Name, context and up to two notes or a follow-up
 
-EXISTING ENTRY:
-Name: {existing_name}
-Context: {existing_context}
 
-NEW ENTRY:
-Name: {new_name}
-Context: {new_context}
+# "[2026-01-31] " at the start of the notes cell or of any note after a " • " separator
+_NOTE_DATE_PREFIX = re.compile(r"(?:^|(?<= • ))\[\d{4}-\d{2}-\d{2}\] ")
 
-Rules:
-- If names are clearly different people (e.g., "John" vs "Sarah") → DIFFERENT
-- If contexts directly conflict (e.g., "works at Google" vs "works at Apple") → LIKELY_DIFFERENT
-- If names match and new context adds info without conflict → LIKELY_SAME
-- If names match and contexts are identical or very similar → SAME
-- When in doubt, prefer LIKELY_SAME or LIKELY_DIFFERENT (let user decide)
 
-Return ONLY one word: SAME, LIKELY_SAME, LIKELY_DIFFERENT, or DIFFERENT"""
-
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.1
-        )
-        result = response.choices[0].message.content.strip().upper()
-        
-        # Validate response
-        if result in ["SAME", "LIKELY_SAME", "LIKELY_DIFFERENT", "DIFFERENT"]:
-            return result
-        return "LIKELY_SAME"  # Default to asking user
-    except Exception as e:
-        print(f"Semantic match error: {e}")
-        return "LIKELY_SAME"  # Default to asking user
+def get_person_note_list(person: dict) -> list:
+    """A person's notes without their "[2026-01-31] " date prefixes, as (note, lowercased note) pairs."""
+    # Strip every note's date prefix in one pass over the whole notes cell
+    notes = _NOTE_DATE_PREFIX.sub('', person.get('notes', ''))
+    return [(note, note.lower()) for note in notes.split(' • ') if note]
 
 
 def format_person_info(person: dict) -> str:
@@ -302,18 +459,18 @@ def format_person_info(person: dict) -> str:
     if person.get('context'):
         parts.append(person['context'])
     
-    # Add notes without dates
-    if person.get('notes'):
-        notes = person['notes']
-        note_list = notes.split(' • ')
-        for note in note_list:
-            clean_note = note
-            if note.startswith('['):
-                clean_note = note.split('] ', 1)[-1]
-            if clean_note and clean_note.lower() not in ' '.join(parts).lower():
-                parts.append(clean_note)
+    # Lowercased text shown so far, grown as parts are added, for the duplicate check
+    shown_lower = ' '.join(parts).lower()
+    
+    # Add notes without dates; only the first 4 parts are shown, so stop there
+    for clean_note, clean_lower in get_person_note_list(person):
+        if len(parts) >= FORMAT_MAX_PARTS:
+            break
+        if clean_lower not in shown_lower:
+            parts.append(clean_note)
+            shown_lower += ' ' + clean_lower
     
-    if person.get('follow_ups') and not person['follow_ups'].startswith('2026'):
+    if len(parts) < FORMAT_MAX_PARTS and person.get('follow_ups') and not person['follow_ups'].startswith('2026'):
         parts.append("Follow up: " + person['follow_ups'])
     
-    return ', '.join(parts[:4])
+    return ', '.join(parts[:FORMAT_MAX_PARTS])
@@ -6,6 +6,9 @@ TELEGRAM_CHAT_ID = os.environ.get("TELEGRAM_CHAT_ID")
 
 # OpenAI
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
+LLM_CACHE = os.environ.get("LLM_CACHE", "exact")  # exact | semantic | off
+LLM_MODEL_FAST = os.environ.get("LLM_MODEL_FAST", "gpt-4o-mini")    # Default for every call
+LLM_MODEL_QUALITY = os.environ.get("LLM_MODEL_QUALITY", "gpt-4o")   # Re-check for unsure classifications; empty = off
 
 # Google Sheets
 GOOGLE_SHEETS_CREDS = os.environ.get("GOOGLE_SHEETS_CREDS")
@@ -0,0 +1,395 @@
+import asyncio
+import contextlib
+import copy
+import functools
+import hashlib
+import math
+import re
+import time
+from collections import OrderedDict
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, NOT_GIVEN, APIConnectionError, APIError, InternalServerError, RateLimitError
+from config import OPENAI_API_KEY, LLM_CACHE, LLM_MODEL_FAST, LLM_MODEL_QUALITY
+
+# Connection pool reused by every request; HTTP/2 multiplexes concurrent completions
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=32, max_connections=64, keepalive_expiry=60.0)
+# Generation can take a while to read; connecting, sending and waiting for a pooled
+# connection should not, so those fail fast instead of hanging for the full 30s
+HTTP_TIMEOUT = httpx.Timeout(30.0, connect=5.0, write=5.0, pool=5.0)
+
+# Model tiers: "fast" serves everything by default, "quality" is for the cases it is unsure about
+MODEL_TIERS = {"fast": LLM_MODEL_FAST, "quality": LLM_MODEL_QUALITY}
+
+# Stable end-user ID sent with every request; keeps routing (and prompt cache hits) consistent
+LLM_USER = "second-brain"
+
+# Max OpenAI requests in flight at once; higher concurrency starts hitting connection errors
+LLM_CONCURRENCY = 20
+_llm_semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+
+# The SDK retries 429s, 5xx and timeouts itself, with exponential backoff and jitter
+LLM_MAX_RETRIES = 3
+
+
+# Shared OpenAI client, built on first use so importing this module stays cheap
+@functools.cache
+def get_aclient() -> AsyncOpenAI:
+    """Get the shared async OpenAI client."""
+    return AsyncOpenAI(
+        api_key=OPENAI_API_KEY,
+        timeout=HTTP_TIMEOUT,
+        max_retries=LLM_MAX_RETRIES,
+        http_client=DefaultAsyncHttpxClient(http2=True, limits=HTTP_LIMITS)
+    )
+
+
+async def aclose_client() -> None:
+    """Close the shared client's pooled connections, if it was ever created."""
+    if get_aclient.cache_info().currsize:
+        await get_aclient().close()
+        get_aclient.cache_clear()
+
+
+# =============================================================================
+# FAILURE HANDLING
+# Once the SDK's retries are spent, fail fast instead of piling more calls onto
+# an API that is already rate limiting or erroring
+# =============================================================================
+
+# Errors worth backing off from (APITimeoutError is an APIConnectionError)
+TRANSIENT_ERRORS = (RateLimitError, APIConnectionError, InternalServerError)
+FAILURE_TTL_SECONDS = 15    # An identical request that just failed isn't re-sent for this long
+BREAKER_FAIL_MAX = 5        # Consecutive failed calls that open the circuit
+BREAKER_RESET_SECONDS = 30  # How long an open circuit rejects every call
+
+# Request key -> time until which it fails fast
+_failed_requests = OrderedDict()
+_breaker = {"failures": 0, "open_until": 0.0}
+
+
+class LLMUnavailableError(Exception):
+    """Raised instead of calling OpenAI while it is known to be failing."""
+
+
+# Everything a chat call can fail with once retries are spent: API errors, the fail-fast
+# rejection above, and ValueError for refusals, truncated replies and unparseable JSON
+LLM_ERRORS = (APIError, LLMUnavailableError, ValueError)
+
+
+def _check_available(key: tuple | None) -> None:
+    """Raise LLMUnavailableError if the circuit is open or this exact request just failed."""
+    now = time.monotonic()
+    if _breaker["open_until"] > now:
+        raise LLMUnavailableError("OpenAI circuit open after repeated failures")
+    if key is None:
+        return
+    until = _failed_requests.get(key)
+    if until is not None:
+        if until > now:
+            raise LLMUnavailableError("Same request failed moments ago")
+        del _failed_requests[key]
+
+
+def _record_failure(key: tuple | None) -> None:
+    """Count a failed call and remember the request so repeats fail fast."""
+    now = time.monotonic()
+    _breaker["failures"] += 1
+    if _breaker["failures"] >= BREAKER_FAIL_MAX:
+        _breaker["open_until"] = now + BREAKER_RESET_SECONDS
+        # Half-open: after the reset window, one more failure re-opens it straight away
+        _breaker["failures"] = BREAKER_FAIL_MAX - 1
+    if key is not None:
+        _failed_requests[key] = now + FAILURE_TTL_SECONDS
+        _failed_requests.move_to_end(key)
+        if len(_failed_requests) > CACHE_MAX_ENTRIES:
+            _failed_requests.popitem(last=False)
+
+
+@contextlib.asynccontextmanager
+async def _guarded(key: tuple | None = None):
+    """Run one OpenAI call under the concurrency limit, the circuit breaker and the failure cache."""
+    _check_available(key)
+    async with _llm_semaphore:
+        try:
+            yield
+        except TRANSIENT_ERRORS:
+            _record_failure(key)
+            raise
+    _breaker["failures"] = 0
+
+
+# =============================================================================
+# RESPONSE CACHE
+# =============================================================================
+
+CACHE_MAX_ENTRIES = 4096
+CACHE_MAX_TEMPERATURE = 0.3  # Above this, responses aren't treated as deterministic
+CACHE_TTL_SECONDS = 86400    # Entries expire after a day so stale answers age out
+
+# (model, prompt hash, temperature, response format name, max tokens) -> (prompt, response text, expiry time)
+_llm_cache = OrderedDict()
+
+# Cache key -> future for a cacheable call still in flight, so a repeat that arrives
+# before the first one finishes (e.g. a cron retry of /digest) waits for it instead.
+# achat_stream() registers under ("stream", key) and resolves once the reply is cached
+_llm_inflight = {}
+
+
+def _cache_key(model: str, prompt: str, temperature: float, response_format: dict | None = None,
+               max_tokens: int | None = None) -> tuple:
+    """Build a compact cache key for a prompt."""
+    prompt_hash = hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+    format_name = None
+    if response_format:
+        format_name = response_format.get("json_schema", {}).get("name", response_format["type"])
+    return (model, prompt_hash, temperature, format_name, max_tokens)
+
+
+def _is_cacheable(temperature: float) -> bool:
+    """Check if a call with this temperature may be served from cache."""
+    return LLM_CACHE != "off" and temperature <= CACHE_MAX_TEMPERATURE
+
+
+def _cache_text(prompt: str, system: str | None) -> str:
+    """The text a cache entry is keyed on - the system prompt and the user prompt."""
+    if system is None:
+        return prompt
+    return f"{system}\x00{prompt}"
+
+
+def _cache_get(key: tuple, prompt: str) -> str | None:
+    """Look up a cached response. Returns None on miss."""
+    cached = _llm_cache.get(key)
+    if cached and cached[2] <= time.monotonic():
+        del _llm_cache[key]
+        return None
+    # Compare full prompt to rule out hash collisions
+    if cached and cached[0] == prompt:
+        _llm_cache.move_to_end(key)
+        return cached[1]
+    return None
+
+
+def _cache_put(key: tuple, prompt: str, content: str) -> None:
+    """Store a response, evicting the least recently used entry when full."""
+    _llm_cache[key] = (prompt, content, time.monotonic() + CACHE_TTL_SECONDS)
+    _llm_cache.move_to_end(key)
+    if len(_llm_cache) > CACHE_MAX_ENTRIES:
+        _llm_cache.popitem(last=False)
+
+
+# =============================================================================
+# SEMANTIC CACHE
+# Catches paraphrases that the exact-match cache misses
+# =============================================================================
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_DIMENSIONS = 256  # Shortened embeddings keep the similarity scan cheap
+EMBEDDING_BATCH_SIZE = 1000  # Inputs per embeddings request
+SEMANTIC_THRESHOLD = 0.92   # Cosine similarity needed to reuse a cached result
+SEMANTIC_MAX_ENTRIES = 1024
+
+# namespace -> list of (unit vector, guard tokens, result)
+_semantic_cache = {}
+
+
+def semantic_cache_enabled() -> bool:
+    """Check if the semantic cache strategy is on."""
+    return LLM_CACHE == "semantic"
+
+
+def _unit(vector: list) -> list:
+    """Scale a vector to unit length."""
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+async def aembed(texts: list) -> list:
+    """Embed texts, batching requests. Returns unit-length vectors in input order."""
+    vectors = []
+    for start in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+        async with _guarded():
+            response = await get_aclient().embeddings.create(
+                model=EMBEDDING_MODEL,
+                input=texts[start:start + EMBEDDING_BATCH_SIZE],
+                dimensions=EMBEDDING_DIMENSIONS,
+                user=LLM_USER
+            )
+        vectors.extend(_unit(item.embedding) for item in response.data)
+    return vectors
+
+
+def cosine(a: list, b: list) -> float:
+    """Cosine similarity of two unit vectors."""
+    return sum(x * y for x, y in zip(a, b))
+
+
+# Capitalized words (past the first word) and numbers carry the facts in a message -
+# names, companies, amounts. Paraphrases that change them must not share a result.
+_GUARD_PATTERN = re.compile(r"(?<!^)\b[A-Z][\w'-]*|\b\d[\d.,:/]*")
+
+
+def lexical_guard(text: str) -> frozenset:
+    """Tokens a cached near-duplicate must share with text to be reused."""
+    return frozenset(token.lower() for token in _GUARD_PATTERN.findall(text.strip()))
+
+
+def _semantic_nearest(namespace: str, vector: list, guard: frozenset):
+    """Best cached result at or above the threshold with the same guard tokens."""
+    best_result = None
+    best_score = SEMANTIC_THRESHOLD
+    for cached_vector, cached_guard, result in _semantic_cache.get(namespace, []):
+        if cached_guard != guard:
+            continue
+        score = cosine(vector, cached_vector)
+        if score >= best_score:
+            best_result, best_score = result, score
+
+    # Callers may mutate what they get back, so never hand out the cached object
+    return copy.deepcopy(best_result)
+
+
+async def asemantic_lookup(namespace: str, text: str, guard: frozenset = frozenset()) -> tuple:
+    """Find a cached result for a near-duplicate text. Returns (vector, result or None)."""
+    vector = (await aembed([text]))[0]
+    return vector, _semantic_nearest(namespace, vector, guard)
+
+
+def semantic_store(namespace: str, vector: list, result, guard: frozenset = frozenset()) -> None:
+    """Remember a result under its embedding and guard tokens."""
+    entries = _semantic_cache.setdefault(namespace, [])
+    entries.append((vector, guard, copy.deepcopy(result)))
+    if len(entries) > SEMANTIC_MAX_ENTRIES:
+        del entries[0]
+
+
+# =============================================================================
+# CHAT COMPLETIONS
+# =============================================================================
+
+def _messages(prompt: str, system: str | None) -> list:
+    """
+    Build the message list. The system prompt goes first so requests that share it
+    share a byte-identical prefix, which OpenAI's prompt caching reuses server-side.
+    """
+    if system is None:
+        return [{"role": "user", "content": prompt}]
+    return [{"role": "system", "content": system}, {"role": "user", "content": prompt}]
+
+
+def _response_text(response, response_format: dict | None) -> str:
+    """Pull the text out of a completion."""
+    choice = response.choices[0]
+    message = choice.message
+    if response_format:
+        # Structured output is valid JSON as sent, unless the model refused or hit max_tokens
+        if message.content is None:
+            raise ValueError(f"Model refused: {message.refusal}")
+        if choice.finish_reason == "length":
+            raise ValueError("Response cut off at max_tokens")
+        return message.content
+    return message.content.strip()
+
+
+async def achat(prompt: str, temperature: float = 0.3, model: str = LLM_MODEL_FAST,
+                response_format: dict | None = None, system: str | None = None,
+                max_tokens: int | None = None) -> str:
+    """
+    Run a chat completion. Returns the response text.
+    Pass response_format (e.g. a json_schema) to have the API guarantee parseable JSON.
+    Pass the stable instructions as system and only the variable data as prompt.
+    Pass max_tokens to cap generation on calls with short, fixed-shape replies.
+    """
+    cache_text = _cache_text(prompt, system)
+    key = _cache_key(model, cache_text, temperature, response_format, max_tokens)
+    cacheable = _is_cacheable(temperature)
+
+    if not cacheable:
+        return await _achat_uncached(key, prompt, temperature, model, response_format, system, max_tokens)
+
+    cached = _cache_get(key, cache_text)
+    if cached is not None:
+        return cached
+    pending = _llm_inflight.get(key)
+    if pending is not None:
+        # Shielded so a waiter giving up doesn't cancel the call for everyone else
+        return await asyncio.shield(pending)
+
+    async def fetch():
+        try:
+            content = await _achat_uncached(key, prompt, temperature, model, response_format, system, max_tokens)
+            _cache_put(key, cache_text, content)
+            return content
+        finally:
+            del _llm_inflight[key]
+
+    _llm_inflight[key] = asyncio.ensure_future(fetch())
+    return await asyncio.shield(_llm_inflight[key])
+
+
+async def _achat_uncached(key: tuple, prompt: str, temperature: float, model: str,
+                          response_format: dict | None, system: str | None, max_tokens: int | None) -> str:
+    """Send one chat completion request for achat()."""
+    async with _guarded(key):
+        response = await get_aclient().chat.completions.create(
+            model=model,
+            messages=_messages(prompt, system),
+            temperature=temperature,
+            response_format=response_format or NOT_GIVEN,
+            max_tokens=max_tokens or NOT_GIVEN,
+            user=LLM_USER
+        )
+    return _response_text(response, response_format)
+
+
+async def achat_stream(prompt: str, temperature: float = 0.3, model: str = LLM_MODEL_FAST, system: str | None = None,
+                       max_tokens: int | None = None):
+    """
+    Streaming version of achat(). Yields text pieces as they arrive.
+    The complete reply is cached like achat(); a cache hit yields it in one piece,
+    as does a repeat of a stream still in flight once that stream finishes.
+    """
+    cache_text = _cache_text(prompt, system)
+    key = _cache_key(model, cache_text, temperature, max_tokens=max_tokens)
+    # Kept apart from achat()'s in-flight calls, whose futures carry the reply itself
+    inflight_key = ("stream", key)
+    cacheable = _is_cacheable(temperature)
+
+    done = None
+    if cacheable:
+        cached = _cache_get(key, cache_text)
+        if cached is None and inflight_key in _llm_inflight:
+            # If the first stream fails, this one falls through and tries itself
+            await asyncio.wait([_llm_inflight[inflight_key]])
+            cached = _cache_get(key, cache_text)
+        if cached is not None:
+            yield cached
+            return
+        if inflight_key not in _llm_inflight:
+            done = _llm_inflight[inflight_key] = asyncio.get_running_loop().create_future()
+
+    pieces = []
+    try:
+        async with _guarded(key):
+            stream = await get_aclient().chat.completions.create(
+                model=model,
+                messages=_messages(prompt, system),
+                temperature=temperature,
+                max_tokens=max_tokens or NOT_GIVEN,
+                user=LLM_USER,
+                stream=True
+            )
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                piece = chunk.choices[0].delta.content
+                if piece:
+                    pieces.append(piece)
+                    yield piece
+
+        if cacheable:
+            _cache_put(key, cache_text, "".join(pieces).strip())
+    finally:
+        if done is not None:
+            del _llm_inflight[inflight_key]
+            done.set_result(None)
@@ -1,21 +1,25 @@
-import json
+import functools
+import re
 import threading
 import asyncio
-from telegram import Update, Bot
+import time
+import orjson
+from telegram import Update
 from telegram.ext import Application, MessageHandler, filters, ContextTypes
 from flask import Flask, jsonify
 
-from config import TELEGRAM_TOKEN, TELEGRAM_CHAT_ID, OPENAI_API_KEY
-from classifier import classify, needs_confirmation, format_person_info, semantic_person_match, is_person_question, answer_people_query, answer_actionable_query
-from memory import save_entry, fix_entry, get_items, get_digest_data, find_similar_person, append_to_person, extract_identifier, get_all_people
-from prompts import DIGEST_PROMPT, get_top_items_prompt
-from openai import OpenAI
+from config import TELEGRAM_TOKEN, TELEGRAM_CHAT_ID
+from classifier import classify, needs_confirmation, format_person_info, is_person_question, answer_people_query_stream, answer_actionable_query, start_question_embedding
+from memory import save_entry, fix_entry, get_items, get_digest_data, get_actionable_data, find_similar_person, find_people_by_name, append_to_person, extract_identifier, get_all_people
+from prompts import BUCKETS, DIGEST_PROMPT, TOP_ITEMS_PROMPT, get_top_items_message
+from llm import achat, achat_stream, aclose_client, LLM_ERRORS
 
 # Flask app for cron endpoints
 flask_app = Flask(__name__)
 
-# OpenAI client for digest generation
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
+# The running bot and its event loop, set once it starts. Async clients (OpenAI, Telegram) are
+# bound to the loop, so Flask threads hand their async work to it instead of making their own.
+_bot = {"loop": None, "bot": None}
 
 # =============================================================================
 # SHORTCUTS - for fix and top commands
@@ -38,12 +42,15 @@ TABLE_SHORTCUTS = {
     "all": "all"
 }
 
+# A leading command word ("top", "fix:", ...) and the rest of the message
+_COMMAND_PATTERN = re.compile(r"(\w+)(?::\s*|\s+|$)(.*)", re.DOTALL)
+
 
 # =============================================================================
 # CONFIRMATION PARSING
 # =============================================================================
 
-AFFIRMATIVE = [
+AFFIRMATIVE = frozenset([
     # English basics
     "y", "yes", "yea", "yeah", "yep", "yup", "ya", "ye", "ys",
     # Casual
@@ -64,9 +71,9 @@ AFFIRMATIVE = [
     "👍", "✅", "👌", "🙌", "💯", "✔", "☑",
     # Typos
     "yse", "yess", "yea h", "yeap", "yep!", "yes!", "ya!", "yeah!"
-]
+])
 
-NEGATIVE = [
+NEGATIVE = frozenset([
     # English basics
     "n", "no", "nah", "nope", "nop", "na", "nay",
     # Casual
@@ -87,7 +94,15 @@ NEGATIVE = [
     "👎", "❌", "✖", "🚫",
     # Typos
     "ni", "np", "noo", "nooo", "nope!"
-]
+])
+
+# Phrases looked for anywhere in the reply - only phrases, not single chars
+_AFFIRMATIVE_PHRASES = tuple(sorted(p for p in AFFIRMATIVE if len(p) > 2))
+_NEGATIVE_PHRASES = tuple(sorted(p for p in NEGATIVE if len(p) > 2))
+
+# Substring phrase scans, one pass over the reply each
+_AFFIRMATIVE_RE = re.compile("|".join(map(re.escape, _AFFIRMATIVE_PHRASES)))
+_NEGATIVE_RE = re.compile("|".join(map(re.escape, _NEGATIVE_PHRASES)))
 
 
 def parse_confirmation(reply: str) -> str:
@@ -100,54 +115,124 @@ def parse_confirmation(reply: str) -> str:
     if reply in NEGATIVE:
         return "DENY"
     
-    # Check if any affirmative phrase is in the reply
-    for phrase in AFFIRMATIVE:
-        if len(phrase) > 2 and phrase in reply:  # Only check phrases, not single chars
-            return "CONFIRM"
-    
-    # Check if any negative phrase is in the reply
-    for phrase in NEGATIVE:
-        if len(phrase) > 2 and phrase in reply:
-            return "DENY"
+    # Check if any affirmative phrase is in the reply, then any negative one
+    if _AFFIRMATIVE_RE.search(reply):
+        return "CONFIRM"
+    if _NEGATIVE_RE.search(reply):
+        return "DENY"
     
     return "OTHER"
 
 
+def tag_identifiers(matches: list) -> list:
+    """
+    Work out each match's identifier ("at Google") and the words in it a reply can pick
+    the match by - once, when the choice is offered, rather than on every reply.
+    Returns tagged copies; the matches may be the People index's shared dicts.
+    """
+    tagged = []
+    for match in matches:
+        identifier = extract_identifier(match.get("context", ""))
+        words = identifier.lower().replace("from ", "").replace("your ", "").split() if identifier else []
+        tagged.append({**match, "_identifier": identifier, "_id_words": tuple(word for word in words if len(word) > 2)})
+    return tagged
+
+
+def picks_match(reply_lower: str, match: dict) -> bool:
+    """Check if a reply mentions one of a tagged match's identifier words."""
+    return any(word in reply_lower for word in match["_id_words"])
+
+
+# =============================================================================
+# QUERY PHRASES
+# =============================================================================
+
+# Messages that ask for today's/this week's actions (matched with any trailing "?" removed)
+ACTION_PHRASES = frozenset([
+    # today
+    "items for today", "give me top things for today",
+    "what do i need to do today", "what's due today", "whats due today",
+    "today's tasks", "todays tasks", "what's on my plate", "whats on my plate",
+    "what should i do today", "what do i have today", "anything pending",
+    "my tasks", "my actions", "what's pending", "whats pending",
+    "what do i need to do", "what should i do", "what should i focus on",
+    "anything for today", "tasks for today", "what's up for today",
+    "whats up for today", "priorities", "priorities for today",
+    "what's coming up", "whats coming up", "anything due today",
+    "what's happening today", "whats happening today", "to do list",
+    "todo list", "todos", "to dos",
+    # this week
+    "tasks for this week", "this week's tasks", "this weeks tasks",
+    "what's due this week", "whats due this week", "anything this week",
+    "what do i have this week", "priorities this week", "what's coming up this week",
+    "whats coming up this week", "anything pending this week",
+    "weekly tasks", "week ahead", "the week ahead"
+])
+
+# Question words in front of a name ("who is john" -> "john")
+_QUESTION_PREFIX = re.compile(r"^(?:tell me about|tell about|what about|who is|who's|show me)\b")
+
+
 # =============================================================================
 # DIGEST FUNCTIONS
 # =============================================================================
 
-def generate_digest(data):
-    """Use ChatGPT to generate daily digest."""
-    prompt = DIGEST_PROMPT + json.dumps(data, indent=2)
+SMALL_DIGEST_MAX_ITEMS = 3  # Digests with this few items are formatted directly, without the LLM
+
+
+def format_small_digest(data):
+    """Format a digest with only a few items as one bullet per item."""
+    bullets = []
+    for item in data["interviews"]:
+        role = f" ({item['role']})" if item["role"] else ""
+        bullets.append(f"• {item['company']}{role}: {item['next_step'] or item['status']}")
+    for item in data["things"]:
+        due = f" (due {item['due']})" if item["due"] else ""
+        bullets.append(f"• {item['next_action'] or item['task']}{due}")
+    for item in data["people"]:
+        bullets.append(f"• {item['name']}: {item['follow_ups']}")
+    return "📋 Daily Digest\n\n" + "\n".join(bullets)
+
+
+DIGEST_CUT_OFF = "\n\n⚠️ Digest cut off - couldn't finish generating it."
+
+
+async def generate_digest_stream(data, outcome: dict | None = None):
+    """
+    Generate the daily digest - templated when it's small, otherwise written by ChatGPT.
+    Yields text pieces as they arrive; yields nothing if generation fails before the first one,
+    and ends with DIGEST_CUT_OFF if it fails part way. Either failure sets outcome["ok"] to False.
+    """
+    total = len(data["interviews"]) + len(data["things"]) + len(data["people"])
+    if not total:
+        yield "📋 Daily Digest\n\nNo pending actions. You're all caught up! 🎉"
+        return
+    if total <= SMALL_DIGEST_MAX_ITEMS:
+        yield format_small_digest(data)
+        return
     
+    started = False
     try:
-        response = openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3
-        )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
+        async for piece in achat_stream(orjson.dumps(data, option=orjson.OPT_SORT_KEYS).decode(), system=DIGEST_PROMPT):
+            started = True
+            yield piece
+    except LLM_ERRORS as e:
         print(f"Error generating digest: {e}")
-        return None
+        if outcome is not None:
+            outcome["ok"] = False
+        # Part of the digest is already on screen - say it's incomplete
+        if started:
+            yield DIGEST_CUT_OFF
 
 
-def format_top_items(table_name, items):
+async def format_top_items(table_name, items):
     """Format items for Telegram message."""
     if not items:
         return f"No active items in {table_name}."
     
-    prompt = get_top_items_prompt(table_name, items)
-    
     try:
-        response = openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3
-        )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
+        return await achat(get_top_items_message(table_name, items), system=TOP_ITEMS_PROMPT)
+    except LLM_ERRORS as e:
         print(f"Error formatting items: {e}")
         result = f"Top {table_name}:\n"
         for item in items[:5]:
@@ -157,33 +242,40 @@ def format_top_items(table_name, items):
 
 async def send_digest_async():
     """Send digest via Telegram."""
-    data = get_digest_data()
+    data = await asyncio.to_thread(get_digest_data)
     if not data:
         return False, "Could not fetch data"
     
-    if not data["interviews"] and not data["things"] and not data["people"]:
-        message = "📋 Daily Digest\n\nNo pending actions. You're all caught up! 🎉"
-    else:
-        message = generate_digest(data)
-        if not message:
-            return False, "Could not generate digest"
-    
     try:
-        bot = Bot(token=TELEGRAM_TOKEN)
-        await bot.send_message(chat_id=TELEGRAM_CHAT_ID, text=message)
-        return True, "Digest sent"
+        # The application's bot keeps its HTTPS connection to Telegram open between sends
+        send = functools.partial(_bot["bot"].send_message, TELEGRAM_CHAT_ID)
+        outcome = {"ok": True}
+        message = await send_streaming(send, generate_digest_stream(data, outcome))
     except Exception as e:
         print(f"Error sending digest: {e}")
         return False, str(e)
+    
+    if not message:
+        return False, "Could not generate digest"
+    if not outcome["ok"]:
+        return False, "Digest cut off part way through generation"
+    return True, "Digest sent"
+
+
+DIGEST_TIMEOUT = 90  # Seconds a /digest request waits before giving up
 
 
 def send_digest_sync():
-    """Synchronous wrapper for sending digest."""
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    result = loop.run_until_complete(send_digest_async())
-    loop.close()
-    return result
+    """Synchronous wrapper for sending digest - runs it on the bot's event loop."""
+    loop = _bot["loop"]
+    if loop is None:
+        return False, "Bot not started yet"
+    future = asyncio.run_coroutine_threadsafe(send_digest_async(), loop)
+    try:
+        return future.result(timeout=DIGEST_TIMEOUT)
+    except TimeoutError:
+        future.cancel()
+        return False, "Digest timed out"
 
 
 # =============================================================================
@@ -206,11 +298,118 @@ def health_check():
     return jsonify({"status": "ok"}), 200
 
 
+FLASK_THREADS = 4  # Worker threads serving /digest and /health
+
+
 def run_flask():
-    """Run Flask in a separate thread."""
+    """Run Flask in a separate thread, behind waitress rather than the Werkzeug dev server."""
     import os
+    from waitress import serve
     port = int(os.environ.get("PORT", 8080))
-    flask_app.run(host="0.0.0.0", port=port)
+    serve(flask_app, host="0.0.0.0", port=port, threads=FLASK_THREADS)
+
+
+# =============================================================================
+# STREAMING REPLIES
+# =============================================================================
+
+STREAM_EDIT_INTERVAL = 1.0  # Telegram allows roughly one edit per second per message
+
+
+async def reply_streaming(update: Update, pieces, empty_text: str = "Sorry, I couldn't process that question.") -> str:
+    """Stream an answer as a reply to the user's message. Returns the full text."""
+    return await send_streaming(update.message.reply_text, pieces, empty_text)
+
+
+async def send_streaming(send, pieces, empty_text: str | None = None) -> str:
+    """
+    Send text as it is generated: the first words go out as a new message via send(text),
+    which is then edited at most once per STREAM_EDIT_INTERVAL. Returns the full text.
+    If nothing is generated, sends empty_text instead (or nothing, if it's None).
+    """
+    text = ""
+    sent_text = ""
+    message = None
+    last_edit = 0.0
+    
+    async for piece in pieces:
+        text += piece
+        shown = text.strip()
+        if not shown:
+            continue
+        if message is None:
+            message = await send(shown)
+            sent_text, last_edit = shown, time.monotonic()
+        elif shown != sent_text and time.monotonic() - last_edit >= STREAM_EDIT_INTERVAL:
+            await message.edit_text(shown)
+            sent_text, last_edit = shown, time.monotonic()
+    
+    text = text.strip()
+    if message is None:
+        if empty_text:
+            await send(empty_text)
+    elif text != sent_text:
+        await message.edit_text(text)
+    return text
+
+
+# =============================================================================
+# COMMAND HANDLERS
+# =============================================================================
+
+async def handle_top(update: Update, context: ContextTypes.DEFAULT_TYPE, table_request: str):
+    """top <table> - top items from one table, or the full digest for "all"."""
+    table_name = TABLE_SHORTCUTS.get(table_request)
+    
+    if table_name == "all":
+        # Send full digest directly (async)
+        data = await asyncio.to_thread(get_digest_data)
+        if not data:
+            await update.message.reply_text("❌ Could not fetch data.")
+            return
+        
+        await reply_streaming(update, generate_digest_stream(data), "❌ Could not generate digest.")
+    elif table_name:
+        items = await asyncio.to_thread(get_items, table_name)
+        reply = await format_top_items(table_name, items)
+        await update.message.reply_text(reply)
+    else:
+        await update.message.reply_text("❌ Unknown table. Use: top people / things / interviews / ideas / linkedin / all")
+
+
+async def handle_fix(update: Update, context: ContextTypes.DEFAULT_TYPE, new_bucket: str):
+    """fix <bucket> - move the last saved message to another bucket."""
+    new_bucket = BUCKET_SHORTCUTS.get(new_bucket, new_bucket)
+    
+    if new_bucket in BUCKETS:
+        if "last_message" in context.user_data:
+            last = context.user_data["last_message"]
+            success, old_bucket = await asyncio.to_thread(
+                fix_entry,
+                last["message_id"], 
+                new_bucket, 
+                last["original_text"],
+                last["classification"]
+            )
+            
+            if success:
+                reply = f"✓ Fixed. Moved from {old_bucket} to {new_bucket.capitalize()}."
+            else:
+                reply = "❌ Could not find the entry to fix."
+        else:
+            reply = "❌ No recent message to fix."
+    else:
+        reply = "❌ Invalid category. Use: fix people / fix ideas / fix interviews / fix things / fix linkedin"
+    
+    await update.message.reply_text(reply)
+
+
+# Command word -> handler(update, context, rest of the message)
+COMMANDS = {
+    "top": handle_top,
+    "fix": handle_fix,
+    "fx": handle_fix,
+}
 
 
 # =============================================================================
@@ -233,9 +432,8 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             idx = int(user_message.strip()) - 1
             if 0 <= idx < len(pending["matches"]):
                 selected = pending["matches"][idx]
-                answer = answer_people_query(pending["original_question"], [selected])
                 del context.user_data["pending_person_question"]
-                await update.message.reply_text(answer)
+                await reply_streaming(update, answer_people_query_stream(pending["original_question"], [selected]))
                 return
             else:
                 await update.message.reply_text(f"Pick a number between 1 and {len(pending['matches'])}")
@@ -245,9 +443,8 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         confirmation = parse_confirmation(user_message)
         if confirmation == "CONFIRM" and len(pending["matches"]) == 1:
             selected = pending["matches"][0]
-            answer = answer_people_query(pending["original_question"], [selected])
             del context.user_data["pending_person_question"]
-            await update.message.reply_text(answer)
+            await reply_streaming(update, answer_people_query_stream(pending["original_question"], [selected]))
             return
         elif confirmation == "DENY":
             del context.user_data["pending_person_question"]
@@ -255,54 +452,27 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
         
         # Check if user mentioned an identifier to pick
-        user_lower = user_message.lower()
-        for i, match in enumerate(pending["matches"]):
-            identifier = extract_identifier(match.get("context", ""))
-            if identifier:
-                id_words = identifier.lower().replace("from ", "").replace("your ", "").split()
-                if any(word in user_lower for word in id_words if len(word) > 2):
-                    selected = match
-                    answer = answer_people_query(pending["original_question"], [selected])
-                    del context.user_data["pending_person_question"]
-                    await update.message.reply_text(answer)
-                    return
+        for match in pending["matches"]:
+            if picks_match(user_message_lower, match):
+                selected = match
+                del context.user_data["pending_person_question"]
+                await reply_streaming(update, answer_people_query_stream(pending["original_question"], [selected]))
+                return
         
         # Didn't understand - clear and fall through to process as new message
         del context.user_data["pending_person_question"]
     
     # ----- ACTIONABLE TASKS QUERY -----
-    action_phrases = [
-        # today
-        "items for today", "give me top things for today",
-        "what do i need to do today", "what's due today", "whats due today",
-        "today's tasks", "todays tasks", "what's on my plate", "whats on my plate",
-        "what should i do today", "what do i have today", "anything pending",
-        "my tasks", "my actions", "what's pending", "whats pending",
-        "what do i need to do", "what should i do", "what should i focus on",
-        "anything for today", "tasks for today", "what's up for today",
-        "whats up for today", "priorities", "priorities for today",
-        "what's coming up", "whats coming up", "anything due today",
-        "what's happening today", "whats happening today", "to do list",
-        "todo list", "todos", "to dos",
-        # this week
-        "tasks for this week", "this week's tasks", "this weeks tasks",
-        "what's due this week", "whats due this week", "anything this week",
-        "what do i have this week", "priorities this week", "what's coming up this week",
-        "whats coming up this week", "anything pending this week",
-        "weekly tasks", "week ahead", "the week ahead"
-    ]
-    
-    if user_message_lower in action_phrases or user_message_lower.rstrip("?") in action_phrases:
-        from memory import get_actionable_data
-        data = get_actionable_data()
-        print(f"[DEBUG] Actionable data - People: {len(data.get('people', []))}, Things: {len(data.get('things', []))}")
-        print(f"[DEBUG] People data: {data.get('people', [])}")
-        print(f"[DEBUG] Things data: {data.get('things', [])}")
+    if user_message_lower.rstrip("?") in ACTION_PHRASES:
+        data = await asyncio.to_thread(get_actionable_data)
         if not data:
             await update.message.reply_text("Could not fetch data.")
             return
+        print(f"[DEBUG] Actionable data - People: {len(data.get('people', []))}, Things: {len(data.get('things', []))}")
+        print(f"[DEBUG] People data: {data.get('people', [])}")
+        print(f"[DEBUG] Things data: {data.get('things', [])}")
         
-        reply = answer_actionable_query(user_message, data)
+        reply = await answer_actionable_query(user_message, data)
         await update.message.reply_text(reply)
         return
 
@@ -314,28 +484,28 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         query = question_check.get("query", user_message)
         print(f"[DEBUG] Query: {query}")
         
+        # Embed the question while the People sheet loads
+        query_embedding = start_question_embedding(query)
+        
         # Get all people
-        all_people = get_all_people()
+        all_people = await asyncio.to_thread(get_all_people)
         print(f"[DEBUG] Total people found: {len(all_people) if all_people else 0}")
         
         if not all_people:
+            query_embedding.cancel()
             await update.message.reply_text("I don't have any people saved yet.")
             return
         
         # Check if question is about a specific person name with multiple matches
         # Extract potential name from question (strip question words)
         query_lower = query.lower().strip().rstrip('?!.')
-        strip_words = ["tell me about", "tell about", "what about", "who is", "who's", "show me"]
-        extracted_name = query_lower
-        for sw in strip_words:
-            if extracted_name.startswith(sw):
-                extracted_name = extracted_name[len(sw):].strip()
-                break
+        extracted_name = _QUESTION_PREFIX.sub("", query_lower, count=1).strip()
         
         # Check if extracted name matches multiple people
         if extracted_name:
-            name_matches = [p for p in all_people if p['name'].lower() == extracted_name.lower()]
+            name_matches = await asyncio.to_thread(find_people_by_name, extracted_name)
             if len(name_matches) > 1:
+                name_matches = tag_identifiers(name_matches)
                 # Multiple matches — ask which one (question mode)
                 context.user_data["pending_person_question"] = {
                     "original_question": query,
@@ -345,86 +515,35 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 person_name = name_matches[0]['name']
                 reply = f"Which {person_name}?\n"
                 for i, m in enumerate(name_matches, 1):
-                    identifier = extract_identifier(m.get("context", ""))
+                    identifier = m["_identifier"]
                     reply_line = f"{i}. {m['name']}"
                     if identifier:
                         reply_line += f", {identifier.replace('from ', '')}"
                     reply += reply_line + "\n"
                 
+                query_embedding.cancel()
                 await update.message.reply_text(reply)
                 return
         
         # Single or no specific name — send all data to LLM
-        answer = answer_people_query(query, all_people)
+        answer = await reply_streaming(update, answer_people_query_stream(query, all_people, query_embedding))
         print(f"[DEBUG] LLM answer: {answer}")
-        await update.message.reply_text(answer)
         return
 
-    if user_message_lower.startswith("top"):
-        table_request = user_message_lower.replace("top", "").strip()
-        table_name = TABLE_SHORTCUTS.get(table_request)
-        
-        if table_name == "all":
-            # Send full digest directly (async)
-            data = get_digest_data()
-            if not data:
-                await update.message.reply_text("❌ Could not fetch data.")
-                return
-            
-            if not data["interviews"] and not data["things"] and not data["people"]:
-                reply = "📋 Daily Digest\n\nNo pending actions. You're all caught up! 🎉"
-            else:
-                reply = generate_digest(data)
-                if not reply:
-                    await update.message.reply_text("❌ Could not generate digest.")
-                    return
-            
-            await update.message.reply_text(reply)
-            return
-        elif table_name:
-            items = get_items(table_name)
-            reply = format_top_items(table_name, items)
-            await update.message.reply_text(reply)
-            return
-        else:
-            await update.message.reply_text("❌ Unknown table. Use: top people / admin / interviews / ideas / linkedin / all")
-            return
-    
-    # ----- COMMAND: fix <bucket> -----
-    if user_message_lower.startswith("fix") or user_message_lower.startswith("fx"):
-        new_bucket = user_message_lower.replace("fix:", "").replace("fix", "").replace("fx:", "").replace("fx", "").strip()
-        new_bucket = BUCKET_SHORTCUTS.get(new_bucket, new_bucket)
-        
-        if new_bucket in ["people", "ideas", "interviews", "things", "linkedin"]:
-            if "last_message" in context.user_data:
-                last = context.user_data["last_message"]
-                success, old_bucket = fix_entry(
-                    last["message_id"], 
-                    new_bucket, 
-                    last["original_text"],
-                    last["classification"]
-                )
-                
-                if success:
-                    reply = f"✓ Fixed. Moved from {old_bucket} to {new_bucket.capitalize()}."
-                else:
-                    reply = "❌ Could not find the entry to fix."
-            else:
-                reply = "❌ No recent message to fix."
-        else:
-            reply = "❌ Invalid category. Use: fix people / fix ideas / fix interviews / fix things / fix linkedin"
-        
-        await update.message.reply_text(reply)
+    # ----- COMMANDS: top <table>, fix <bucket> -----
+    command = _COMMAND_PATTERN.match(user_message_lower)
+    if command and command[1] in COMMANDS:
+        await COMMANDS[command[1]](update, context, command[2].strip())
         return
     
     # ----- LOW CONFIDENCE CORRECTION -----
-    if user_message_lower in ["people", "ideas", "interviews", "things", "linkedin"]:
+    if user_message_lower in BUCKETS:
         if "pending_message" in context.user_data:
             pending = context.user_data["pending_message"]
             pending["classification"]["bucket"] = user_message_lower
             pending["classification"]["confidence"] = 1.0
             
-            success = save_entry(pending["original_text"], pending["classification"], pending["message_id"])
+            success = await asyncio.to_thread(save_entry, pending["original_text"], pending["classification"], pending["message_id"])
             
             if success:
                 fields = pending["classification"]["fields"]
@@ -453,7 +572,8 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             idx = int(user_message.strip()) - 1
             if 0 <= idx < len(all_matches):
                 selected = all_matches[idx]
-                success = append_to_person(
+                success = await asyncio.to_thread(
+                    append_to_person,
                     selected["row_idx"],
                     pending["original_text"],
                     pending["classification"]["fields"],
@@ -471,32 +591,30 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 return
         
         # Check if user typed an identifier to select (e.g., "google", "mckinsey")
-        user_lower = user_message.lower()
         for match in all_matches:
-            identifier = extract_identifier(match.get("context", ""))
-            if identifier:
-                id_words = identifier.lower().replace("from ", "").replace("your ", "").split()
-                if any(word in user_lower for word in id_words if len(word) > 2):
-                    success = append_to_person(
-                        match["row_idx"],
-                        pending["original_text"],
-                        pending["classification"]["fields"],
-                        pending["message_id"]
-                    )
-                    if success:
-                        reply = f"Added to {match['name']}."
-                    else:
-                        reply = "❌ Error updating. Please try again."
-                    del context.user_data["pending_merge"]
-                    await update.message.reply_text(reply)
-                    return
+            if picks_match(user_message_lower, match):
+                success = await asyncio.to_thread(
+                    append_to_person,
+                    match["row_idx"],
+                    pending["original_text"],
+                    pending["classification"]["fields"],
+                    pending["message_id"]
+                )
+                if success:
+                    reply = f"Added to {match['name']}."
+                else:
+                    reply = "❌ Error updating. Please try again."
+                del context.user_data["pending_merge"]
+                await update.message.reply_text(reply)
+                return
         
         confirmation = parse_confirmation(user_message)
         
         if confirmation == "CONFIRM":
             # Single match confirmation
             if pending.get("existing_person"):
-                success = append_to_person(
+                success = await asyncio.to_thread(
+                    append_to_person,
                     pending["existing_person"]["row_idx"],
                     pending["original_text"],
                     pending["classification"]["fields"],
@@ -508,7 +626,8 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 else:
                     reply = "❌ Error updating. Please try again."
             elif len(all_matches) == 1:
-                success = append_to_person(
+                success = await asyncio.to_thread(
+                    append_to_person,
                     all_matches[0]["row_idx"],
                     pending["original_text"],
                     pending["classification"]["fields"],
@@ -529,7 +648,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         
         elif confirmation == "DENY":
             # Save as new person
-            success = save_entry(pending["original_text"], pending["classification"], pending["message_id"], force_new=True)
+            success = await asyncio.to_thread(save_entry, pending["original_text"], pending["classification"], pending["message_id"], force_new=True)
             
             if success:
                 name = pending["classification"]["fields"].get("name", "")
@@ -547,7 +666,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             # Fall through to normal message processing
     
     # ----- NORMAL MESSAGE: CLASSIFY AND SAVE -----
-    classification = classify(user_message)
+    classification = await classify(user_message)
     
     # Check if needs confirmation
     if needs_confirmation(classification["confidence"]):
@@ -575,13 +694,14 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         new_context = classification["fields"].get("context", "")
         
         if name:
-            similar_matches = find_similar_person(name)
+            similar_matches = await asyncio.to_thread(find_similar_person, name)
             
             if similar_matches:
+                similar_matches = tag_identifiers(similar_matches)
                 if len(similar_matches) == 1:
                     # Single match — ask to confirm
                     similar = similar_matches[0]
-                    identifier = extract_identifier(similar["context"])
+                    identifier = similar["_identifier"]
                     
                     context.user_data["pending_merge"] = {
                         "original_text": user_message,
@@ -612,7 +732,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     
                     reply = "Which one?\n"
                     for i, m in enumerate(similar_matches, 1):
-                        identifier = extract_identifier(m.get("context", ""))
+                        identifier = m["_identifier"]
                         reply += f"{i}. {m['name']}"
                         if identifier:
                             reply += f", {identifier.replace('from ', '')}"
@@ -623,7 +743,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     return
     
     # Save to memory
-    success = save_entry(user_message, classification, message_id)
+    success = await asyncio.to_thread(save_entry, user_message, classification, message_id)
     
     if success:
         confidence_pct = int(classification["confidence"] * 100)
@@ -671,6 +791,18 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
 # MAIN
 # =============================================================================
 
+async def on_startup(app: Application) -> None:
+    """Remember the bot and its event loop so Flask can schedule digests on them."""
+    _bot["loop"] = asyncio.get_running_loop()
+    _bot["bot"] = app.bot
+
+
+async def on_shutdown(app: Application) -> None:
+    """Close the OpenAI connection pool cleanly when the bot stops."""
+    _bot["loop"] = None
+    await aclose_client()
+
+
 def main():
     import os
     
@@ -693,7 +825,7 @@ def main():
     
     # Start Telegram bot
     print("Starting bot...")
-    app = Application.builder().token(TELEGRAM_TOKEN).build()
+    app = Application.builder().token(TELEGRAM_TOKEN).post_init(on_startup).post_shutdown(on_shutdown).build()
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
     
     print("Bot is running. Listening for messages...")
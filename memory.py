@@ -1,9 +1,17 @@
+import functools
 import json
+import re
+import threading
+import time
 from datetime import datetime
 import gspread
+from rapidfuzz import fuzz
 from google.oauth2.service_account import Credentials
 from config import GOOGLE_SHEETS_CREDS, SHEET_ID
 
+# Handles are cached for the life of the process: authorizing and opening the
+# spreadsheet each cost a round trip, and google-auth refreshes the token itself
+@functools.lru_cache(maxsize=1)
 def get_sheets_client():
     """Initialize Google Sheets client."""
     creds_dict = json.loads(GOOGLE_SHEETS_CREDS)
@@ -15,67 +23,241 @@ def get_sheets_client():
     return gspread.authorize(creds)
 
 
+@functools.lru_cache(maxsize=1)
+def get_spreadsheet():
+    """Get the second brain spreadsheet."""
+    return get_sheets_client().open_by_key(SHEET_ID)
+
+
+@functools.lru_cache(maxsize=None)
+def get_worksheet(name: str):
+    """Get a tab of the spreadsheet by name."""
+    return get_spreadsheet().worksheet(name)
+
+
+# =============================================================================
+# SHEET VALUES CACHE
+# One message can read the same tab several times (find similar, then save);
+# serve repeat reads from memory and drop a tab's entry whenever we write to it
+# =============================================================================
+
+SHEET_CACHE_TTL = 30  # Seconds; also bounds how long edits made directly in the sheet go unseen
+
+# Columns each tab uses; the last one is the active flag. Reads are limited to these
+# so stray cells further right neither bloat the response nor shift row[-1].
+SHEET_COLUMNS = {
+    "People": 7,
+    "Ideas": 5,
+    "Interviews": 7,
+    "Things": 6,
+    "LinkedIn": 5,
+    "Inbox Log": 7
+}
+
+# Tab name -> (fetch time, all values)
+_sheet_cache = {}
+
+# Reads run in worker threads (handlers, /digest); one at a time, so a tab that is
+# already being fetched is waited for and then served from the cache, and a write's
+# invalidation can't land in the middle of a fetch
+_sheet_lock = threading.RLock()
+
+
+def _sheet_range(name: str) -> str:
+    """A1 range covering a tab's columns, or the whole tab if its width isn't known."""
+    cols = SHEET_COLUMNS.get(name)
+    return gspread.utils.absolute_range_name(name, f"A:{chr(ord('A') + cols - 1)}" if cols else None)
+
+
+def get_sheets_values(names: list, ttl: float = SHEET_CACHE_TTL) -> list:
+    """
+    All values of several tabs, header rows included, at most ttl seconds old.
+    Tabs that aren't cached are fetched together in one request.
+    """
+    with _sheet_lock:
+        now = time.monotonic()
+        values = {}
+        for name in names:
+            cached = _sheet_cache.get(name)
+            if cached and now - cached[0] < ttl:
+                values[name] = cached[1]
+        
+        missing = [name for name in names if name not in values]
+        if missing:
+            response = get_spreadsheet().values_batch_get([_sheet_range(name) for name in missing])
+            for name, value_range in zip(missing, response["valueRanges"]):
+                # The API trims empty trailing cells; pad every row out to the tab's full width
+                rows = value_range.get("values", [])
+                values[name] = gspread.utils.fill_gaps(rows, cols=SHEET_COLUMNS.get(name)) if rows else []
+                _sheet_cache[name] = (now, values[name])
+    
+    return [values[name] for name in names]
+
+
+def get_sheet_values(name: str, ttl: float = SHEET_CACHE_TTL) -> list:
+    """All values of a tab, header row included, at most ttl seconds old."""
+    return get_sheets_values([name], ttl)[0]
+
+
+def get_row_values(name: str, row_idx: int, ttl: float = SHEET_CACHE_TTL) -> list:
+    """One row of a tab, from the cache if it is fresh, otherwise fetching just that row."""
+    with _sheet_lock:
+        cached = _sheet_cache.get(name)
+        if cached and time.monotonic() - cached[0] < ttl and row_idx <= len(cached[1]):
+            return cached[1][row_idx - 1]
+    row = get_worksheet(name).row_values(row_idx)
+    return gspread.utils.fill_gaps([row], cols=SHEET_COLUMNS.get(name))[0]
+
+
+def invalidate_sheet(name: str) -> None:
+    """
+    Forget a tab's cached values after writing to it. Taking the lock means a fetch
+    already in flight finishes and caches first, so its pre-write values are dropped here.
+    """
+    with _sheet_lock:
+        _sheet_cache.pop(name, None)
+
+
+# Name lookups and person dicts over the cached People values, rebuilt whenever those
+# values are re-read. The person dicts are shared, so memos stored on them (search
+# tokens, prompt blocks) carry over between queries on the same snapshot.
+_people_index = {"values": None, "active": [], "by_name": {}, "people": [], "people_by_name": {}}
+
+
+def get_people_index() -> tuple:
+    """
+    Active People rows as (active, by_name): active is a list of (lowercased name, row index, row)
+    in sheet order, by_name maps a lowercased, stripped name to every (row index, row) with it.
+    """
+    with _sheet_lock:
+        all_rows = get_sheet_values("People")
+        if _people_index["values"] is not all_rows:
+            active = []
+            by_name = {}
+            people = []
+            people_by_name = {}
+            for idx, row in enumerate(all_rows[1:], start=2):  # Skip header
+                if len(row) >= 1 and row[-1] == "TRUE":
+                    name_lower = row[0].lower().strip()
+                    person = person_from_row(idx, row)
+                    active.append((name_lower, idx, row))
+                    by_name.setdefault(name_lower, []).append((idx, row))
+                    people.append(person)
+                    people_by_name.setdefault(name_lower, []).append(person)
+            _people_index.update(values=all_rows, active=active, by_name=by_name,
+                                 people=people, people_by_name=people_by_name)
+        return _people_index["active"], _people_index["by_name"]
+
+
+def person_from_row(row_idx: int, row: list) -> dict:
+    """Turn a People row into a person dict."""
+    return {
+        "row_idx": row_idx,
+        "name": row[0],
+        "context": row[1] if len(row) > 1 else "",
+        "notes": row[2] if len(row) > 2 else "",
+        "follow_ups": row[3] if len(row) > 3 else "",
+        "last_touched": row[4] if len(row) > 4 else ""
+    }
+
+
+def update_row_cells(sheet, row_idx: int, updates: dict) -> None:
+    """Write several cells of one row in a single API call. updates maps column number -> value."""
+    sheet.batch_update(
+        [{"range": gspread.utils.rowcol_to_a1(row_idx, col), "values": [[value]]} for col, value in updates.items()],
+        value_input_option="USER_ENTERED"
+    )
+    invalidate_sheet(sheet.title)
+
+
+def _cell(value) -> dict:
+    """A cell holding value as-is, the way append_row stores it (numbers stay numbers)."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {"userEnteredValue": {"numberValue": value}}
+    return {"userEnteredValue": {"stringValue": str(value)}}
+
+
+def append_rows(rows: dict) -> None:
+    """
+    Append one row to each of several tabs in a single API call. rows maps tab name -> row.
+    Either every row is written or none is.
+    """
+    get_spreadsheet().batch_update({"requests": [
+        {
+            "appendCells": {
+                "sheetId": get_worksheet(name).id,
+                "rows": [{"values": [_cell(value) for value in row]}],
+                "fields": "userEnteredValue"
+            }
+        }
+        for name, row in rows.items()
+    ]})
+    for name in rows:
+        invalidate_sheet(name)
+
+
+# Phrases that introduce each kind of identifier, in priority order
+IDENTIFIER_KEYWORDS = {
+    "work": ["works at ", "works for ", "works in ", "working at ", "working for "],
+    "role": ["is a ", "is an ", "as a ", "as an "],
+    "location": ["lives in ", "based in ", "from "],
+    "relation": ["roommate", "friend", "colleague", "brother", "sister", "wife", "husband", "partner", "boss", "manager", "coworker"],
+    "event": ["met at ", "met during "],
+}
+
+# One pattern for every keyword, with a named group per kind
+_IDENTIFIER_PATTERN = re.compile(
+    "|".join(f"(?P<{kind}>{'|'.join(map(re.escape, keywords))})" for kind, keywords in IDENTIFIER_KEYWORDS.items()),
+    re.IGNORECASE
+)
+
+
 def extract_identifier(context: str) -> str:
     """Extract the most identifying detail from context - short and clean."""
     if not context:
         return ""
     
-    context_lower = context.lower()
+    # Find every keyword in one scan, grouped by kind so the priority order still applies
+    hits = {}
+    for match in _IDENTIFIER_PATTERN.finditer(context):
+        hits.setdefault(match.lastgroup, []).append(match)
     
     # Check for company/workplace
-    work_keywords = ["works at ", "works for ", "works in ", "working at ", "working for "]
-    for keyword in work_keywords:
-        if keyword in context_lower:
-            idx = context_lower.find(keyword)
-            rest = context[idx + len(keyword):].strip()
-            # Get company name (first word or two)
-            words = rest.split()
-            if words:
-                company = words[0].rstrip('.,;:()and')
-                if company:
-                    return f"works at {company}"
+    for match in hits.get("work", []):
+        # Get company name (first word or two)
+        words = context[match.end():].split()
+        if words:
+            company = words[0].rstrip('.,;:()and')
+            if company:
+                return f"works at {company}"
     
     # Check for job/role
-    role_keywords = ["is a ", "is an ", "as a ", "as an "]
-    for keyword in role_keywords:
-        if keyword in context_lower:
-            idx = context_lower.find(keyword)
-            rest = context[idx + len(keyword):].strip()
-            words = rest.split()[:2]
-            if words:
-                role = " ".join(words).rstrip('.,;:()and')
-                if role:
-                    return role
+    for match in hits.get("role", []):
+        words = context[match.end():].split()[:2]
+        if words:
+            role = " ".join(words).rstrip('.,;:()and')
+            if role:
+                return role
     
     # Check for location
-    location_keywords = ["lives in ", "based in ", "from "]
-    for keyword in location_keywords:
-        if keyword in context_lower:
-            idx = context_lower.find(keyword)
-            rest = context[idx + len(keyword):].strip()
-            words = rest.split()
-            if words:
-                location = words[0].rstrip('.,;:()and')
-                if location:
-                    return f"in {location}"
+    for match in hits.get("location", []):
+        words = context[match.end():].split()
+        if words:
+            location = words[0].rstrip('.,;:()and')
+            if location:
+                return f"in {location}"
     
     # Check for relationship
-    relation_keywords = ["roommate", "friend", "colleague", "brother", "sister", "wife", "husband", "partner", "boss", "manager", "coworker"]
-    for rel in relation_keywords:
-        if rel in context_lower:
-            return f"your {rel}"
+    for match in hits.get("relation", []):
+        return f"your {match.group().lower()}"
     
     # Check for event/meeting context
-    event_keywords = ["met at ", "met during "]
-    for keyword in event_keywords:
-        if keyword in context_lower:
-            idx = context_lower.find(keyword)
-            rest = context[idx + len(keyword):].strip()
-            words = rest.split()[:2]
-            if words:
-                event = " ".join(words).rstrip('.,;:()and')
-                if event:
-                    return f"met at {event}"
+    for match in hits.get("event", []):
+        words = context[match.end():].split()[:2]
+        if words:
+            event = " ".join(words).rstrip('.,;:()and')
+            if event:
+                return f"met at {event}"
     
     # Fallback: first meaningful phrase (up to 3 words, clean)
     # Remove common starting words
@@ -94,8 +276,11 @@ def extract_identifier(context: str) -> str:
     return ""
 
 
-def fuzzy_match_name(name1: str, name2: str) -> float:
-    """Calculate similarity between two names. Returns 0.0 to 1.0."""
+def fuzzy_match_name(name1: str, name2: str, score_cutoff: float = 0.0) -> float:
+    """
+    Calculate similarity between two names. Returns 0.0 to 1.0.
+    Edit-distance scores below score_cutoff come back as 0.0.
+    """
     n1 = name1.lower().strip()
     n2 = name2.lower().strip()
     
@@ -113,42 +298,27 @@ def fuzzy_match_name(name1: str, name2: str) -> float:
     if n1_first == n2_first:
         return 0.85
     
-    # Simple character-based similarity
-    shorter = min(len(n1), len(n2))
-    longer = max(len(n1), len(n2))
-    if longer == 0:
-        return 0.0
-    
-    matches = sum(c1 == c2 for c1, c2 in zip(n1, n2))
-    return matches / longer
+    # Edit-distance similarity; handles typos, insertions and swapped letters.
+    # With a cutoff, rapidfuzz bails out early and returns 0 below it.
+    return fuzz.ratio(n1, n2, score_cutoff=score_cutoff * 100) / 100
+
+
+SIMILAR_NAME_THRESHOLD = 0.8  # fuzzy_match_name score for a possible existing person
 
 
 def find_similar_person(name: str) -> list:
     """Find all people with similar name. Returns list of matches."""
     try:
-        client = get_sheets_client()
-        spreadsheet = client.open_by_key(SHEET_ID)
-        sheet = spreadsheet.worksheet("People")
-        all_rows = sheet.get_all_values()
+        active, _ = get_people_index()
         
         name_lower = name.lower().strip()
         matches = []
         
-        for idx, row in enumerate(all_rows[1:], start=2):
-            if len(row) >= 1 and row[-1] == "TRUE":
-                existing_name = row[0]
-                score = fuzzy_match_name(name, existing_name)
-                
-                if score >= 0.8:
-                    matches.append({
-                        "row_idx": idx,
-                        "name": existing_name,
-                        "context": row[1] if len(row) > 1 else "",
-                        "notes": row[2] if len(row) > 2 else "",
-                        "follow_ups": row[3] if len(row) > 3 else "",
-                        "last_touched": row[4] if len(row) > 4 else "",
-                        "score": score
-                    })
+        for existing_lower, idx, row in active:
+            score = fuzzy_match_name(name_lower, existing_lower, SIMILAR_NAME_THRESHOLD)
+            
+            if score >= SIMILAR_NAME_THRESHOLD:
+                matches.append({**person_from_row(idx, row), "score": score})
         
         return matches
     except Exception as e:
@@ -159,38 +329,35 @@ def find_similar_person(name: str) -> list:
 def append_to_person(row_idx: int, new_text: str, fields: dict, message_id: int) -> bool:
     """Append new note to existing person."""
     try:
-        client = get_sheets_client()
-        spreadsheet = client.open_by_key(SHEET_ID)
-        sheet = spreadsheet.worksheet("People")
+        sheet = get_worksheet("People")
         
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         note_entry = f"[{timestamp[:10]}] {new_text}"
         
         # Get current row
-        all_rows = sheet.get_all_values()
-        current_row = all_rows[row_idx - 1]
+        current_row = get_row_values("People", row_idx)
         
         # Append to notes
         current_notes = current_row[2] if len(current_row) > 2 else ""
         new_notes = current_notes + " • " + note_entry if current_notes else note_entry
         
         # Update notes (column 3), last touched (column 5), message_id (column 6)
-        sheet.update_cell(row_idx, 3, new_notes)
-        sheet.update_cell(row_idx, 5, timestamp)
-        sheet.update_cell(row_idx, 6, message_id)
+        updates = {3: new_notes, 5: timestamp, 6: message_id}
         
         # Update follow-ups if provided
         if fields.get("follow_ups"):
             current_followups = current_row[3] if len(current_row) > 3 else ""
             new_followups = current_followups + " | " + fields.get("follow_ups") if current_followups else fields.get("follow_ups")
-            sheet.update_cell(row_idx, 4, new_followups)
+            updates[4] = new_followups
         
         # Update context if new info provided
         if fields.get("context"):
             current_context = current_row[1] if len(current_row) > 1 else ""
             if fields.get("context").lower() not in current_context.lower():
                 new_context = current_context + ", " + fields.get("context") if current_context else fields.get("context")
-                sheet.update_cell(row_idx, 2, new_context)
+                updates[2] = new_context
+        
+        update_row_cells(sheet, row_idx, updates)
         
         print(f"Appended to existing person at row {row_idx}")
         return True
@@ -199,12 +366,19 @@ def append_to_person(row_idx: int, new_text: str, fields: dict, message_id: int)
         return False
 
 
+# Bucket -> (tab, (field, default) per column); every row ends with message_id and the active flag.
+# People rows are merged into existing ones, so they go through save_or_update_person instead.
+_WRITERS = {
+    "ideas": ("Ideas", (("idea", ""), ("one_liner", ""), ("notes", ""))),
+    "interviews": ("Interviews", (("company", ""), ("role", ""), ("status", "Lead"), ("next_step", ""), ("date", ""))),
+    "things": ("Things", (("task", ""), ("status", "Open"), ("due", ""), ("next_action", ""))),
+    "linkedin": ("LinkedIn", (("idea", ""), ("notes", ""), ("status", "Draft")))
+}
+
+
 def save_entry(captured_text: str, classification: dict, message_id: int, force_new: bool = False) -> bool:
     """Save the classified message to the appropriate Google Sheet tab."""
     try:
-        client = get_sheets_client()
-        spreadsheet = client.open_by_key(SHEET_ID)
-        
         bucket = classification["bucket"]
         fields = classification["fields"]
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -212,57 +386,22 @@ def save_entry(captured_text: str, classification: dict, message_id: int, force_
         # Save to the appropriate sheet based on bucket
         if bucket == "people":
             # Check if person already exists (unless force_new)
-            saved = save_or_update_person(spreadsheet, fields, captured_text, message_id, timestamp, force_new)
+            saved = save_or_update_person(fields, captured_text, message_id, timestamp, force_new)
             if saved:
-                log_to_inbox(spreadsheet, fields.get("name", ""), captured_text, bucket, classification["confidence"], timestamp, message_id)
+                log_to_inbox(fields.get("name", ""), captured_text, bucket, classification["confidence"], timestamp, message_id)
             return saved
-        elif bucket == "ideas":
-            sheet = spreadsheet.worksheet("Ideas")
-            row = [
-                fields.get("idea", ""),
-                fields.get("one_liner", ""),
-                fields.get("notes", ""),
-                message_id,
-                "TRUE"
-            ]
-        elif bucket == "interviews":
-            sheet = spreadsheet.worksheet("Interviews")
-            row = [
-                fields.get("company", ""),
-                fields.get("role", ""),
-                fields.get("status", "Lead"),
-                fields.get("next_step", ""),
-                fields.get("date", ""),
-                message_id,
-                "TRUE"
-            ]
-        elif bucket == "things":
-            sheet = spreadsheet.worksheet("Things")
-            row = [
-                fields.get("task", ""),
-                fields.get("status", "Open"),
-                fields.get("due", ""),
-                fields.get("next_action", ""),
-                message_id,
-                "TRUE"
-            ]
-        elif bucket == "linkedin":
-            sheet = spreadsheet.worksheet("LinkedIn")
-            row = [
-                fields.get("idea", ""),
-                fields.get("notes", ""),
-                fields.get("status", "Draft"),
-                message_id,
-                "TRUE"
-            ]
-        else:
-            return False
         
-        sheet.append_row(row)
+        if bucket not in _WRITERS:
+            return False
+        sheet_name, columns = _WRITERS[bucket]
+        row = [fields.get(field, default) for field, default in columns] + [message_id, "TRUE"]
         
-        # Log to Inbox Log
+        # Save the row and log it to Inbox Log in one request
         title = fields.get("name") or fields.get("idea") or fields.get("company") or fields.get("task") or captured_text[:50]
-        log_to_inbox(spreadsheet, title, captured_text, bucket, classification["confidence"], timestamp, message_id)
+        append_rows({
+            sheet_name: row,
+            "Inbox Log": inbox_row(title, captured_text, bucket, classification["confidence"], timestamp, message_id)
+        })
         
         print(f"Saved to {bucket}: {title}")
         return True
@@ -271,39 +410,37 @@ def save_entry(captured_text: str, classification: dict, message_id: int, force_
         return False
 
 
-def save_or_update_person(spreadsheet, fields, captured_text, message_id, timestamp, force_new: bool = False) -> bool:
+def save_or_update_person(fields, captured_text, message_id, timestamp, force_new: bool = False) -> bool:
     """Save new person or update existing person's notes."""
     try:
-        sheet = spreadsheet.worksheet("People")
-        all_rows = sheet.get_all_values()
+        sheet = get_worksheet("People")
         
         name = fields.get("name", "").strip()
         if not name:
             return False
         
         # Search for existing person (exact match, case-insensitive) unless force_new
-        found_idx = None
+        found_idx, found_row = None, None
         if not force_new:
-            for idx, row in enumerate(all_rows[1:], start=2):  # Skip header
-                if len(row) >= 1 and row[0].lower() == name.lower() and row[-1] == "TRUE":
-                    found_idx = idx
-                    break
+            same_name = get_people_index()[1].get(name.lower())
+            if same_name:
+                found_idx, found_row = same_name[0]
         
         note_entry = f"[{timestamp[:10]}] {captured_text}"
         
         if found_idx:
             # Person exists - append to notes
-            current_notes = all_rows[found_idx - 1][2] if len(all_rows[found_idx - 1]) > 2 else ""
+            current_notes = found_row[2] if len(found_row) > 2 else ""
             new_notes = current_notes + " • " + note_entry if current_notes else note_entry
             
             # Update notes (column 3), last touched (column 5), message_id (column 6)
-            sheet.update_cell(found_idx, 3, new_notes)
-            sheet.update_cell(found_idx, 5, timestamp)
-            sheet.update_cell(found_idx, 6, message_id)
+            updates = {3: new_notes, 5: timestamp, 6: message_id}
             
             # Update follow-ups if provided
             if fields.get("follow_ups"):
-                sheet.update_cell(found_idx, 4, fields.get("follow_ups"))
+                updates[4] = fields.get("follow_ups")
+            
+            update_row_cells(sheet, found_idx, updates)
             
             print(f"Updated existing person: {name}")
         else:
@@ -318,6 +455,7 @@ def save_or_update_person(spreadsheet, fields, captured_text, message_id, timest
                 "TRUE"
             ]
             sheet.append_row(row)
+            invalidate_sheet("People")
             print(f"Created new person: {name}")
         
         return True
@@ -329,71 +467,58 @@ def save_or_update_person(spreadsheet, fields, captured_text, message_id, timest
 def find_person(name: str) -> list:
     """Find person(s) by name. Returns list of matches."""
     try:
-        client = get_sheets_client()
-        spreadsheet = client.open_by_key(SHEET_ID)
-        sheet = spreadsheet.worksheet("People")
-        all_rows = sheet.get_all_values()
-        
-        matches = []
+        active, _ = get_people_index()
         name_lower = name.lower()
-        
-        for idx, row in enumerate(all_rows[1:], start=2):
-            if len(row) >= 1 and row[-1] == "TRUE":
-                if name_lower in row[0].lower():
-                    matches.append({
-                        "row_idx": idx,
-                        "name": row[0],
-                        "context": row[1] if len(row) > 1 else "",
-                        "notes": row[2] if len(row) > 2 else "",
-                        "follow_ups": row[3] if len(row) > 3 else "",
-                        "last_touched": row[4] if len(row) > 4 else ""
-                    })
-        
-        return matches
+        return [person_from_row(idx, row) for existing_lower, idx, row in active if name_lower in existing_lower]
     except Exception as e:
         print(f"Memory error (find person): {e}")
         return []
 
 
+def find_people_by_name(name: str) -> list:
+    """Find every active person with exactly this name (case-insensitive). Returns list of matches."""
+    try:
+        with _sheet_lock:
+            get_people_index()
+            return list(_people_index["people_by_name"].get(name.lower().strip(), []))
+    except Exception as e:
+        print(f"Memory error (find people by name): {e}")
+        return []
+
+
 def get_all_people() -> list:
-    """Get all active people from the sheet."""
+    """
+    Get all active people from the sheet.
+    The same list is returned until the People values are re-read - don't modify it.
+    """
     try:
-        client = get_sheets_client()
-        spreadsheet = client.open_by_key(SHEET_ID)
-        sheet = spreadsheet.worksheet("People")
-        all_rows = sheet.get_all_values()
-        
-        people = []
-        for idx, row in enumerate(all_rows[1:], start=2):
-            if len(row) >= 1 and row[-1] == "TRUE":
-                people.append({
-                    "row_idx": idx,
-                    "name": row[0],
-                    "context": row[1] if len(row) > 1 else "",
-                    "notes": row[2] if len(row) > 2 else "",
-                    "follow_ups": row[3] if len(row) > 3 else "",
-                    "last_touched": row[4] if len(row) > 4 else ""
-                })
-        
-        return people
+        with _sheet_lock:
+            get_people_index()
+            return _people_index["people"]
     except Exception as e:
         print(f"Memory error (get all people): {e}")
         return []
 
 
-def log_to_inbox(spreadsheet, title, captured_text, bucket, confidence, timestamp, message_id):
+def inbox_row(title, captured_text, bucket, confidence, timestamp, message_id) -> list:
+    """Build an Inbox Log row."""
+    return [
+        title,
+        captured_text,
+        bucket.capitalize(),
+        confidence,
+        timestamp,
+        message_id,
+        ""  # fixed_to column
+    ]
+
+
+def log_to_inbox(title, captured_text, bucket, confidence, timestamp, message_id):
     """Log entry to Inbox Log."""
     try:
-        inbox = spreadsheet.worksheet("Inbox Log")
-        inbox.append_row([
-            title,
-            captured_text,
-            bucket.capitalize(),
-            confidence,
-            timestamp,
-            message_id,
-            ""  # fixed_to column
-        ])
+        inbox = get_worksheet("Inbox Log")
+        inbox.append_row(inbox_row(title, captured_text, bucket, confidence, timestamp, message_id))
+        invalidate_sheet("Inbox Log")
     except Exception as e:
         print(f"Memory error (inbox log): {e}")
 
@@ -401,41 +526,36 @@ def log_to_inbox(spreadsheet, title, captured_text, bucket, confidence, timestam
 def fix_entry(message_id: int, new_bucket: str, original_text: str, classification: dict) -> tuple:
     """Move an entry from one sheet to another."""
     try:
-        client = get_sheets_client()
-        spreadsheet = client.open_by_key(SHEET_ID)
-        
         # Find the entry in all sheets by message_id
         sheets_to_check = ["People", "Ideas", "Interviews", "Things", "LinkedIn"]
         found_sheet = None
         found_row_idx = None
         found_row_data = None
         
-        for sheet_name in sheets_to_check:
-            try:
-                sheet = spreadsheet.worksheet(sheet_name)
-                all_values = sheet.get_all_values()
-                
-                for idx, row in enumerate(all_values[1:], start=2):
-                    if len(row) >= 2:
-                        msg_id_col = -2
-                        if str(row[msg_id_col]) == str(message_id):
-                            found_sheet = sheet_name
-                            found_row_idx = idx
-                            found_row_data = row
-                            break
-                if found_sheet:
+        # One request for every tab not already cached (plus the Inbox Log, updated
+        # below - appends never shift its existing rows), then scan them in memory
+        message_id_str = str(message_id)
+        *tabs, inbox_rows = get_sheets_values(sheets_to_check + ["Inbox Log"])
+        for sheet_name, all_values in zip(sheets_to_check, tabs):
+            for idx, row in enumerate(all_values[1:], start=2):
+                msg_id_col = -2
+                if len(row) >= 2 and row[msg_id_col] == message_id_str:
+                    found_sheet = sheet_name
+                    found_row_idx = idx
+                    found_row_data = row
                     break
-            except:
-                continue
+            if found_sheet:
+                break
         
         if not found_sheet:
             print(f"Could not find entry with message_id {message_id}")
             return False, None
         
         # Mark old entry as inactive
-        old_sheet = spreadsheet.worksheet(found_sheet)
+        old_sheet = get_worksheet(found_sheet)
         is_active_col = len(found_row_data)
         old_sheet.update_cell(found_row_idx, is_active_col, "FALSE")
+        invalidate_sheet(found_sheet)
         
         # Update classification bucket and save
         classification["bucket"] = new_bucket
@@ -444,11 +564,11 @@ def fix_entry(message_id: int, new_bucket: str, original_text: str, classificati
         
         # Update Inbox Log with fixed_to
         try:
-            inbox = spreadsheet.worksheet("Inbox Log")
-            all_rows = inbox.get_all_values()
-            for idx, row in enumerate(all_rows[1:], start=2):
-                if len(row) >= 6 and str(row[5]) == str(message_id):
+            inbox = get_worksheet("Inbox Log")
+            for idx, row in enumerate(inbox_rows[1:], start=2):
+                if len(row) >= 6 and row[5] == message_id_str:
                     inbox.update_cell(idx, 7, new_bucket.capitalize())
+                    invalidate_sheet("Inbox Log")
                     break
         except Exception as e:
             print(f"Error updating Inbox Log fixed_to: {e}")
@@ -463,21 +583,11 @@ def fix_entry(message_id: int, new_bucket: str, original_text: str, classificati
 def get_items(table_name: str, active_only: bool = True) -> list:
     """Get items from a specific table."""
     try:
-        client = get_sheets_client()
-        spreadsheet = client.open_by_key(SHEET_ID)
-        
-        sheet = spreadsheet.worksheet(table_name)
-        rows = sheet.get_all_values()[1:]
-        
-        items = []
-        for row in rows:
-            if active_only:
-                if len(row) >= 2 and row[-1] == "TRUE":
-                    items.append(row)
-            else:
-                items.append(row)
+        rows = get_sheet_values(table_name)[1:]
         
-        return items
+        if not active_only:
+            return rows
+        return [row for row in rows if len(row) >= 2 and row[-1] == "TRUE"]
     except Exception as e:
         print(f"Memory error (get items): {e}")
         return []
@@ -486,8 +596,7 @@ def get_items(table_name: str, active_only: bool = True) -> list:
 def get_actionable_data() -> dict:
     """Pull actionable items from People and Things."""
     try:
-        client = get_sheets_client()
-        spreadsheet = client.open_by_key(SHEET_ID)
+        people, things = get_sheets_values(["People", "Things"])
         
         data = {
             "people": [],
@@ -496,8 +605,7 @@ def get_actionable_data() -> dict:
         
         # Get People (all active — LLM will find actionable items)
         try:
-            sheet = spreadsheet.worksheet("People")
-            rows = sheet.get_all_values()[1:]
+            rows = people[1:]
             for row in rows:
                 if len(row) >= 6 and row[-1] == "TRUE":
                     data["people"].append({
@@ -511,8 +619,7 @@ def get_actionable_data() -> dict:
         
         # Get Things (open tasks)
         try:
-            sheet = spreadsheet.worksheet("Things")
-            rows = sheet.get_all_values()[1:]
+            rows = things[1:]
             for row in rows:
                 if len(row) >= 5 and row[-1] == "TRUE" and row[1] == "Open":
                     data["things"].append({
@@ -532,8 +639,7 @@ def get_actionable_data() -> dict:
 def get_digest_data() -> dict:
     """Pull data from sheets for daily digest."""
     try:
-        client = get_sheets_client()
-        spreadsheet = client.open_by_key(SHEET_ID)
+        interviews, things, people = get_sheets_values(["Interviews", "Things", "People"])
         
         data = {
             "interviews": [],
@@ -543,8 +649,7 @@ def get_digest_data() -> dict:
         
         # Get Interviews (active ones)
         try:
-            sheet = spreadsheet.worksheet("Interviews")
-            rows = sheet.get_all_values()[1:]
+            rows = interviews[1:]
             for row in rows:
                 if len(row) >= 6 and row[-1] == "TRUE":
                     data["interviews"].append({
@@ -559,8 +664,7 @@ def get_digest_data() -> dict:
         
         # Get Things (open tasks)
         try:
-            sheet = spreadsheet.worksheet("Things")
-            rows = sheet.get_all_values()[1:]
+            rows = things[1:]
             for row in rows:
                 if len(row) >= 5 and row[-1] == "TRUE" and row[1] == "Open":
                     data["things"].append({
@@ -574,8 +678,7 @@ def get_digest_data() -> dict:
         
         # Get People (with follow-ups)
         try:
-            sheet = spreadsheet.worksheet("People")
-            rows = sheet.get_all_values()[1:]
+            rows = people[1:]
             for row in rows:
                 if len(row) >= 6 and row[-1] == "TRUE" and row[3]:
                     data["people"].append({
@@ -6,6 +6,8 @@
 # -----------------------------------------------------------------------------
 # CLASSIFIER PROMPT
 # Used to classify incoming messages into buckets
+# Sent as the system message, so keep it free of per-request data (dates, IDs):
+# an unchanged prefix is what lets OpenAI's prompt caching kick in
 # -----------------------------------------------------------------------------
 
 CLASSIFIER_PROMPT = """You are a classifier for a personal second brain.
@@ -25,7 +27,7 @@ Return JSON ONLY. No markdown. No extra text.
   "fields": {}
 }
 
-The "fields" object depends on the bucket:
+Always fill "fields" in the same response. The "fields" object depends on the bucket:
 
 For "people":
 {"name": "person's name (REQUIRED - extract from message)", "context": "who they are/how you know them", "follow_ups": "any action item mentioned, or empty"}
@@ -63,63 +65,213 @@ DATA CLEANING RULES (apply to all fields):
 
 Example 1:
 Input: "met alex at residency, leads products for ar/vi, says he's interested in my startup"
-Output: bucket = "people"
+Output:
 {
-  "name": "Alex",
-  "context": "Met at residency. Leads product for AR/VR. Interested in my startup.",
-  "follow_ups": ""
+  "bucket": "people",
+  "confidence": 0.95,
+  "fields": {
+    "name": "Alex",
+    "context": "Met at residency. Leads product for AR/VR. Interested in my startup.",
+    "follow_ups": ""
+  }
 }
 
 Example 2:
 Input: "Julia is traveling to Paris next week"
-Output: bucket = "people"
+Output:
 {
-  "name": "Julia",
-  "context": "Traveling to Paris next week.",
-  "follow_ups": ""
+  "bucket": "people",
+  "confidence": 0.9,
+  "fields": {
+    "name": "Julia",
+    "context": "Traveling to Paris next week.",
+    "follow_ups": ""
+  }
 }
 
 Example 3:
 Input: "pay electricity bill by Friday"
-Output: bucket = "things"
+Output:
 {
-  "task": "Pay electricity bill",
-  "status": "Open",
-  "due": "Friday",
-  "next_action": "Pay the bill"
+  "bucket": "things",
+  "confidence": 0.95,
+  "fields": {
+    "task": "Pay electricity bill",
+    "status": "Open",
+    "due": "Friday",
+    "next_action": "Pay the bill"
+  }
 }
 
-User message:
-"""
+The user message is the text to classify."""
 
 # -----------------------------------------------------------------------------
 # EXTRACT FIELDS PROMPT
 # Used when force rules apply (e.g., "draft" → linkedin)
+# System message per bucket; the message itself is sent as the user message
 # -----------------------------------------------------------------------------
 
-def get_extract_fields_prompt(bucket: str, message: str) -> str:
-    """Generate prompt to extract fields for a specific bucket."""
-    
-    field_schemas = {
-        "linkedin": '{"idea": "post topic", "notes": "full content", "status": "Draft"}',
-        "people": '{"name": "person name", "context": "who they are", "follow_ups": "any action"}',
-        "ideas": '{"idea": "short title", "one_liner": "one sentence", "notes": "details"}',
-        "interviews": '{"company": "company name", "role": "job role", "status": "Lead", "next_step": "action", "date": ""}',
-        "things": '{"task": "short title", "status": "Open", "due": "", "next_action": "concrete step"}'
-    }
-    
-    schema = field_schemas.get(bucket, '{}')
+EXTRACT_FIELD_SCHEMAS = {
+    "linkedin": '{"idea": "post topic", "notes": "full content", "status": "Draft"}',
+    "people": '{"name": "person name", "context": "who they are", "follow_ups": "any action"}',
+    "ideas": '{"idea": "short title", "one_liner": "one sentence", "notes": "details"}',
+    "interviews": '{"company": "company name", "role": "job role", "status": "Lead", "next_step": "action", "date": ""}',
+    "things": '{"task": "short title", "status": "Open", "due": "", "next_action": "concrete step"}'
+}
+
+
+def get_extract_fields_prompt(bucket: str) -> str:
+    """Generate the system prompt to extract fields for a specific bucket."""
+    schema = EXTRACT_FIELD_SCHEMAS.get(bucket, '{}')
     
-    return f"""Extract fields from this message for the "{bucket}" category.
+    return f"""Extract fields from the user message for the "{bucket}" category.
 
 Return JSON ONLY:
-{schema}
+{schema}"""
+
+# -----------------------------------------------------------------------------
+# RESPONSE SCHEMAS
+# Structured output formats - the API guarantees replies match these
+# -----------------------------------------------------------------------------
+
+# Field names per bucket (every field is a string)
+BUCKET_FIELDS = {
+    "people": ["name", "context", "follow_ups"],
+    "ideas": ["idea", "one_liner", "notes"],
+    "interviews": ["company", "role", "status", "next_step", "date"],
+    "things": ["task", "status", "due", "next_action"],
+    "linkedin": ["idea", "notes", "status"]
+}
+
+# Bucket names, for membership checks on user input
+BUCKETS = frozenset(BUCKET_FIELDS)
+
+
+def _object_schema(properties: dict) -> dict:
+    """Strict JSON schema for an object where every property is required."""
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False
+    }
+
+
+def _fields_schema(bucket: str) -> dict:
+    """Schema for one bucket's fields."""
+    return _object_schema({field: {"type": "string"} for field in BUCKET_FIELDS[bucket]})
+
+
+def _response_format(name: str, schema: dict) -> dict:
+    """Wrap a schema as a strict response_format."""
+    return {"type": "json_schema", "json_schema": {"name": name, "strict": True, "schema": schema}}
+
+
+CLASSIFIER_RESPONSE_FORMAT = _response_format("classification", _object_schema({
+    "bucket": {"type": "string", "enum": list(BUCKET_FIELDS)},
+    "confidence": {"type": "number"},
+    "fields": {"anyOf": [_fields_schema(bucket) for bucket in BUCKET_FIELDS]}
+}))
+
+
+def get_extract_fields_response_format(bucket: str) -> dict:
+    """Response format for extract_fields on a given bucket."""
+    return _response_format(f"{bucket}_fields", _fields_schema(bucket))
+
+# -----------------------------------------------------------------------------
+# PEOPLE QUERY PROMPT
+# Used to answer questions about people (system message; data + question go in the user message)
+# -----------------------------------------------------------------------------
+
+PEOPLE_QUERY_PROMPT = """You are a personal assistant. The user message lists everyone I know, followed by my question.
+
+Rules:
+- Answer naturally and concisely, like a friend would
+- Use ALL the data (context, notes, follow-ups) to answer
+- ONLY include people whose data actually answers the question
+- If the question is about a trait (works at X, lives in Y), only return people whose data explicitly mentions that trait
+- If multiple people with the same name exist, do NOT group them together unless BOTH match the query
+- If asking about a specific person by name and multiple exist, show all of them
+- If the data doesn't answer the question, say so honestly
+- Keep it short and conversational
+- Don't make up information that isn't in the data
+
+FORMATTING RULES (very important):
+- NO markdown. No asterisks, no bold, no italic, no headers
+- NO dashes or hyphens as separators
+- Use commas to separate details
+- NO labels like "Name:" or "Context:" or "Notes:"
+- NO raw dates like [2026-01-31]
+- NO filler like "Let me know if you need more" or "Here's what I found"
+- If someone has no follow-ups or notes, just skip it, don't mention it's empty
+- For multiple people with same name, use numbered list like:
+  Two Sarahs:
+  1. Sarah, works at Apple as a designer. Joined a new gym in NH.
+  2. Sarah, met at conference. Amazing speaker. Meeting again in NY next month.
+
+Example good answer: Jack, met at residency. Lives in Boston, works at McKinsey.
+Example bad answer: **Jack** - Met at residency. Lives in Boston. **Works at:** McKinsey. **Last updated:** Jan 31"""
+
+
+def get_people_query_message(people_data: str, question: str) -> str:
+    """Build the user message for a people question. The question goes last."""
+    return f"""Here is everyone I know:
+{people_data}
+
+Question: \"{question}\""""
+
+# -----------------------------------------------------------------------------
+# ACTIONABLE QUERY PROMPT
+# Used for "what should I do today" style questions (system message)
+# -----------------------------------------------------------------------------
+
+ACTIONABLE_QUERY_PROMPT = """You are a personal assistant. The user message gives today's date, my people and their pending actions, my open tasks, and then my question.
+
+YOUR JOB: Find actionable items from BOTH the people and the tasks sections.
+
+People actions include: calls to make, people to text/follow up with, gifts to buy, meetings to schedule, things to check. Look at the "Action" field AND the context/notes for anything that sounds like a to-do.
+
+Things actions include: bills to pay, errands, tasks with due dates.
+
+TIME FILTERING:
+- If question says "today": return items due today, plus undated actions that could be done today. Items with no specific date ARE eligible — they're ongoing to-dos.
+- If question says "this week": return items due this week plus undated actions.
+- If a date has clearly passed (e.g. "Friday" and today is Saturday), still include it as overdue.
+
+FORMAT (follow exactly, note the blank line between sections):
 
-Message: {message}"""
+People:
+1. action here
+2. action here
+
+Things:
+1. action here
+
+RULES:
+- NO markdown, no asterisks, no bold, no dashes
+- Always put a blank line between People and Things sections
+- Max 3 people actions, max 2 things actions
+- If no people actions, skip the People section entirely
+- If no things actions, skip the Things section entirely
+- One short line per item, start with name
+- If absolutely nothing is actionable, say: All clear, nothing pending."""
+
+
+def get_actionable_query_message(today: str, people_data: str, things_data: str, question: str) -> str:
+    """Build the user message for an actionable question. The question goes last."""
+    return f"""Today is {today}.
+
+PEOPLE AND THEIR PENDING ACTIONS:
+{people_data if people_data else "None"}
+
+OPEN TASKS:
+{things_data if things_data else "None"}
+
+Question: \"{question}\""""
 
 # -----------------------------------------------------------------------------
 # DIGEST PROMPT
-# Used for daily digest - top 3 actions
+# Used for daily digest - top 3 actions (system message; the data goes in the user message)
 # -----------------------------------------------------------------------------
 
 DIGEST_PROMPT = """Generate a daily digest. Be extremely concise. No fluff.
@@ -135,24 +287,28 @@ Example format:
 • Pay electricity bill (due Friday)
 • Call mom re: birthday plans
 
-Data:
-"""
+The user message has the data as JSON."""
 
 # -----------------------------------------------------------------------------
 # TOP ITEMS PROMPT
-# Used for "top people", "top admin", etc.
+# Used for "top people", "top things", etc.
+# System message; the table name and its items go in the user message
 # -----------------------------------------------------------------------------
 
-def get_top_items_prompt(table_name: str, items: list) -> str:
-    """Generate prompt to format top items from a table."""
-    import json
-    
-    return f"""Format these {table_name} items as a short bullet list. Max 5 items.
+TOP_ITEMS_PROMPT = """The user message names a table and lists rows from it as JSON.
+Format these items as a short bullet list. Max 5 items.
 Each bullet should be one line, actionable if possible.
-No headers, no fluff.
+No headers, no fluff."""
+
+
+def get_top_items_message(table_name: str, items: list) -> str:
+    """Build the user message with the top items from a table."""
+    import orjson
+    
+    return f"""Table: {table_name}
 
 Data:
-{json.dumps(items[:5])}"""
+{orjson.dumps(items[:5]).decode()}"""
 
 # -----------------------------------------------------------------------------
 # WEEKLY REVIEW PROMPT (for future use)